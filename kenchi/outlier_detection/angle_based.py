@@ -1,12 +1,12 @@
-from itertools import combinations
-
 import numpy as np
 from sklearn.neighbors import NearestNeighbors
+from sklearn.utils import check_random_state, gen_batches
 from sklearn.utils.validation import check_is_fitted
 
 from .base import BaseOutlierDetector
+from ..utils import get_chunk_n_rows
 
-__all__ = ['FastABOD']
+__all__ = ['FastABOD', 'FastVOA']
 
 
 class FastABOD(BaseOutlierDetector):
@@ -38,9 +38,18 @@ class FastABOD(BaseOutlierDetector):
     n_neighbors : int, default 20
         Number of neighbors.
 
+    n_pairs : int, default None
+        Number of neighbor pairs sampled to estimate the variance of angles.
+        If None, all pairs are used. Otherwise, the cost per sample is linear
+        in ``n_pairs`` instead of quadratic in ``n_neighbors``.
+
     p : int, default 2
         Power parameter for the Minkowski metric.
 
+    random_state : int or RandomState instance, default None
+        Seed of the pseudo random number generator used to sample neighbor
+        pairs.
+
     metric_params : dict, default None
         Additioal parameters passed to the requested metric.
 
@@ -58,6 +67,9 @@ class FastABOD(BaseOutlierDetector):
     n_neighbors_ : int
         Actual number of neighbors used for ``kneighbors`` queries.
 
+    pairs_ : array-like of shape (n_pairs_, 2)
+        Ranks of the neighbor pairs used to estimate the variance of angles.
+
     X_ : array-like of shape (n_samples, n_features)
         Training data.
 
@@ -91,7 +103,7 @@ class FastABOD(BaseOutlierDetector):
     def __init__(
         self, algorithm='auto', contamination=0.1, leaf_size=30,
         metric='minkowski', novelty=False, n_jobs=1, n_neighbors=20,
-        p=2, metric_params=None
+        n_pairs=None, p=2, random_state=None, metric_params=None
     ):
         self.algorithm     = algorithm
         self.contamination = contamination
@@ -100,7 +112,9 @@ class FastABOD(BaseOutlierDetector):
         self.novelty       = novelty
         self.n_jobs        = n_jobs
         self.n_neighbors   = n_neighbors
+        self.n_pairs       = n_pairs
         self.p             = p
+        self.random_state  = random_state
         self.metric_params = metric_params
 
     def _check_params(self):
@@ -112,6 +126,11 @@ class FastABOD(BaseOutlierDetector):
                 f'but was {self.n_neighbors}'
             )
 
+        if self.n_pairs is not None and self.n_pairs <= 0:
+            raise ValueError(
+                f'n_pairs must be positive but was {self.n_pairs}'
+            )
+
     def _check_array(self, X, **kwargs):
         kwargs['ensure_min_features'] = 2
         kwargs['ensure_min_samples']  = 4
@@ -121,7 +140,7 @@ class FastABOD(BaseOutlierDetector):
     def _check_is_fitted(self):
         super()._check_is_fitted()
 
-        check_is_fitted(self, ['n_neighbors_', 'X_'])
+        check_is_fitted(self, ['n_neighbors_', 'pairs_', 'X_'])
 
     def _fit(self, X):
         n_samples, _            = X.shape
@@ -135,9 +154,23 @@ class FastABOD(BaseOutlierDetector):
             p                   = self.p,
             metric_params       = self.metric_params
         ).fit(X)
-        self._anomaly_score_min = np.max(
-            self._anomaly_score(X, regularize=False)
-        )
+        ind_a, ind_b            = np.triu_indices(self.n_neighbors_, k=1)
+        n_pairs,                = ind_a.shape
+
+        if self.n_pairs is not None and self.n_pairs < n_pairs:
+            # draw the pairs once so that every sample shares the same sample
+            rnd                 = check_random_state(self.random_state)
+            ind                 = np.sort(
+                rnd.choice(n_pairs, self.n_pairs, replace=False)
+            )
+            ind_a, ind_b        = ind_a[ind], ind_b[ind]
+
+        self.pairs_             = np.column_stack((ind_a, ind_b))
+        abof                    = self._abof(X)
+        self._anomaly_score_min = np.max(abof)
+
+        # reuse the ABOF for each training sample to avoid a second query
+        self._train_anomaly_score = self._regularize(abof)
 
         return self
 
@@ -145,10 +178,15 @@ class FastABOD(BaseOutlierDetector):
         abof = self._abof(X)
 
         if regularize:
-            return np.maximum(0., -np.log(abof / self._anomaly_score_min))
+            return self._regularize(abof)
         else:
             return abof
 
+    def _regularize(self, abof):
+        """Regularize the ABOF so that higher values indicate outliers."""
+
+        return np.maximum(0., -np.log(abof / self._anomaly_score_min))
+
     def _abof(self, X):
         """Compute the Angle-Based Outlier Factor (ABOF) for each sample."""
 
@@ -157,10 +195,266 @@ class FastABOD(BaseOutlierDetector):
         else:
             neigh_ind = self.estimator_.kneighbors(X, return_distance=False)
 
-        return np.var([
-            [
-                (pa @ pb) / (pa @ pa) / (pb @ pb) for pa, pb in combinations(
-                    X_neigh - query_point, 2
+        n_samples, n_features = X.shape
+        _, n_neighbors        = neigh_ind.shape
+        ind_a, ind_b          = self.pairs_.T
+        n_pairs,              = ind_a.shape
+        is_sampled            = 2 * n_pairs < n_neighbors * (n_neighbors - 1)
+        abof                  = np.empty(n_samples)
+
+        if is_sampled:
+            # gather the difference vectors of the sampled pairs only
+            row_bytes         = 8 * (
+                n_neighbors * (n_features + 1) + n_pairs * (2 * n_features + 3)
+            )
+        else:
+            row_bytes         = 8 * (
+                n_neighbors * (n_features + n_neighbors) + 3 * n_pairs
+            )
+
+        chunk_n_rows          = get_chunk_n_rows(
+            row_bytes         = row_bytes,
+            max_n_rows        = n_samples
+        )
+
+        for s in gen_batches(n_samples, chunk_n_rows):
+            # difference vectors from each query point to its neighbors
+            diff              = self.X_[neigh_ind[s]] - X[s, np.newaxis]
+
+            if is_sampled:
+                norm_squared  = np.einsum('ijk,ijk->ij', diff, diff)
+                inner         = np.einsum(
+                    'ijk,ijk->ij', diff[:, ind_a], diff[:, ind_b]
                 )
-            ] for query_point, X_neigh in zip(X, self.X_[neigh_ind])
-        ], axis=1)
+            else:
+                gram          = diff @ diff.transpose(0, 2, 1)
+                norm_squared  = np.einsum('ijj->ij', gram)
+                inner         = gram[:, ind_a, ind_b]
+
+            weighted_cos      = inner \
+                / norm_squared[:, ind_a] / norm_squared[:, ind_b]
+            abof[s]           = np.var(weighted_cos, axis=1)
+
+        return abof
+
+
+class FastVOA(BaseOutlierDetector):
+    """Fast Variance Of Angles (FastVOA) outlier detector.
+
+    The variance of the angles between each sample and all pairs of other
+    samples is estimated from the orderings of the data along random
+    projections, so that neither neighbor search nor enumeration of pairs is
+    required.
+
+    Parameters
+    ----------
+    contamination : float, default 0.1
+        Proportion of outliers in the data set. Used to define the threshold.
+
+    novelty : bool, default False
+        If True, you can use predict, decision_function and anomaly_score on
+        new unseen data and not on the training data.
+
+    n_projections : int, default 100
+        Number of random projections. Projections are used in pairs.
+
+    random_state : int or RandomState instance, default None
+        Seed of the pseudo random number generator.
+
+    Attributes
+    ----------
+    anomaly_score_ : array-like of shape (n_samples,)
+        Anomaly score for each training data.
+
+    contamination_ : float
+        Actual proportion of outliers in the data set.
+
+    threshold_ : float
+        Threshold.
+
+    components_ : array-like of shape (n_projections, n_features)
+        Directions of the random projections.
+
+    References
+    ----------
+    .. [#kriegel08] Kriegel, H.-P., Schubert, M., and Zimek, A.,
+        "Angle-based outlier detection in high-dimensional data,"
+        In Proceedings of SIGKDD, pp. 444-452, 2008.
+
+    .. [#pham12] Pham, N., and Pagh, R.,
+        "A near-linear time approximation algorithm for angle-based outlier
+        detection in high-dimensional data,"
+        In Proceedings of SIGKDD, pp. 877-885, 2012.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from kenchi.outlier_detection import FastVOA
+    >>> X = np.array([
+    ...     [0., 0.], [1., 1.], [2., 0.], [3., -1.], [4., 0.],
+    ...     [5., 1.], [6., 0.], [7., -1.], [8., 0.], [1000., 1.]
+    ... ])
+    >>> det = FastVOA(random_state=0)
+    >>> det.fit_predict(X)
+    array([ 1,  1,  1,  1,  1,  1,  1,  1,  1, -1])
+    """
+
+    def __init__(
+        self, contamination=0.1, novelty=False, n_projections=100,
+        random_state=None
+    ):
+        self.contamination = contamination
+        self.novelty       = novelty
+        self.n_projections = n_projections
+        self.random_state  = random_state
+
+    def _check_params(self):
+        super()._check_params()
+
+        if self.n_projections <= 1:
+            raise ValueError(
+                f'n_projections must be greater than 1 '
+                f'but was {self.n_projections}'
+            )
+
+    def _check_array(self, X, **kwargs):
+        kwargs['ensure_min_samples'] = 3
+
+        return super()._check_array(X, **kwargs)
+
+    def _check_is_fitted(self):
+        super()._check_is_fitted()
+
+        check_is_fitted(self, ['components_'])
+
+    def _fit(self, X):
+        _, n_features            = X.shape
+        rnd                      = check_random_state(self.random_state)
+        self.components_         = rnd.normal(
+            size                 = (self.n_projections, n_features)
+        )
+        self._projections        = X @ self.components_.T
+        voa                      = self._voa(self._projections)
+        self._anomaly_score_min  = np.max(voa)
+
+        # reuse the VOA for each training sample to avoid a second pass
+        self._train_anomaly_score = self._regularize(voa)
+
+        return self
+
+    def _anomaly_score(self, X, regularize=True):
+        voa = self._voa(X @ self.components_.T, novelty=True)
+
+        if regularize:
+            return self._regularize(voa)
+        else:
+            return voa
+
+    def _regularize(self, voa):
+        """Regularize the VOA so that higher values indicate outliers."""
+
+        # estimates that are not positive are treated as tiny variances
+        voa = np.maximum(voa / self._anomaly_score_min, np.finfo(float).eps)
+
+        return np.maximum(0., -np.log(voa))
+
+    def _voa(self, projections, novelty=False):
+        """Estimate the Variance Of Angles (VOA) for each sample.
+
+        For two independent projections, a pair of other samples is separated
+        by the sample in both projections with a probability proportional to
+        the squared angle between them. Hence the covariance between the
+        separation indicators of the two projections, computed over all pairs
+        from quadrant counts, is an unbiased estimate of the VOA.
+        """
+
+        n_samples, _           = projections.shape
+        n_train, _             = self._projections.shape
+
+        if novelty:
+            # queries precede training samples on ties and never count
+            projections        = np.concatenate(
+                [projections, self._projections]
+            )
+            is_train           = np.arange(n_samples + n_train) >= n_samples
+            n_others           = n_train
+        else:
+            is_train           = np.ones(n_samples, dtype=bool)
+            n_others           = n_train - 1
+
+        n_pairs                = n_others * (n_others - 1) / 2.
+        n_projection_pairs     = self.n_projections // 2
+        cov                    = np.zeros(n_samples)
+
+        for k in range(n_projection_pairs):
+            order_i            = np.argsort(
+                projections[:, 2 * k], kind='mergesort'
+            )
+            order_j            = np.argsort(
+                projections[:, 2 * k + 1], kind='mergesort'
+            )
+            rank_j             = np.empty_like(order_j)
+            rank_j[order_j]    = np.arange(order_j.size)
+
+            # number of training samples preceding each sample
+            left_i             = np.empty(order_i.size)
+            left_i[order_i]    = np.cumsum(is_train[order_i]) \
+                - is_train[order_i]
+            left_j             = np.empty(order_j.size)
+            left_j[order_j]    = np.cumsum(is_train[order_j]) \
+                - is_train[order_j]
+            left_both          = np.empty(order_i.size)
+            left_both[order_i] = _count_dominated(
+                rank_j[order_i], is_train[order_i]
+            )
+
+            ll                 = left_both[:n_samples]
+            li                 = left_i[:n_samples]
+            lj                 = left_j[:n_samples]
+            ri                 = n_others - li
+            rj                 = n_others - lj
+            n_separated_both   = ll * (ri - lj + ll) \
+                + (li - ll) * (lj - ll)
+            cov               += n_separated_both \
+                - li * ri * lj * rj / n_pairs
+
+        return np.pi ** 2 * cov / (n_projection_pairs * n_pairs)
+
+
+def _count_dominated(y, weights):
+    """Count, for each position, the weighted number of preceding positions
+    with smaller values, by bottom-up merging of blocks.
+
+    Parameters
+    ----------
+    y : array-like of shape (n_samples,)
+        Distinct integer values.
+
+    weights : array-like of shape (n_samples,)
+        Boolean weights of the positions.
+
+    Returns
+    -------
+    count : array-like of shape (n_samples,)
+        Number of preceding positions with smaller values and True weights.
+    """
+
+    n_samples,     = y.shape
+    count          = np.zeros(n_samples, dtype=np.int64)
+    order          = np.argsort(y, kind='mergesort')
+    width          = 1
+
+    while width < n_samples:
+        # positions grouped by block, in ascending order of values
+        block      = order // (2 * width)
+        ind        = order[np.argsort(block, kind='mergesort')]
+        block      = ind // (2 * width)
+        is_left    = ind % (2 * width) < width
+        cumsum     = np.cumsum(is_left & weights[ind])
+        start      = np.searchsorted(block, block)
+        offset     = np.where(start > 0, cumsum[start - 1], 0)
+        is_right   = ~is_left
+        count[ind[is_right]] += cumsum[is_right] - offset[is_right]
+        width     *= 2
+
+    return count
@@ -4,16 +4,18 @@ import numpy as np
 from scipy.stats import norm
 from sklearn.base import BaseEstimator
 from sklearn.externals.joblib import dump
+from sklearn.metrics import pairwise_distances
 from sklearn.utils import check_array
 from sklearn.utils.validation import check_is_fitted
 
 from ..plotting import plot_anomaly_score, plot_roc_curve
-from ..utils import check_contamination
+from ..utils import check_contamination, reserve_rows
 
-__all__   = ['is_outlier_detector', 'BaseOutlierDetector']
+__all__          = ['is_outlier_detector', 'BaseOutlierDetector']
 
-NEG_LABEL = -1
-POS_LABEL = 1
+MAX_BUFFER_RATIO = 0.1
+NEG_LABEL        = -1
+POS_LABEL        = 1
 
 
 def is_outlier_detector(estimator):
@@ -132,11 +134,22 @@ class BaseOutlierDetector(BaseEstimator, ABC):
 
         X                     = self._check_array(X, estimator=self)
 
+        # ``_fit`` may set ``_train_anomaly_score`` when the anomaly score for
+        # each training sample is obtained as a by-product of fitting
+        self._train_anomaly_score = None
+
         self._fit(X)
 
         self.classes_         = np.array([NEG_LABEL, POS_LABEL])
         _, self.n_features_   = X.shape
-        self.anomaly_score_   = self._anomaly_score(X)
+
+        if self._train_anomaly_score is None:
+            self.anomaly_score_ = self._anomaly_score(X)
+        else:
+            self.anomaly_score_ = self._train_anomaly_score
+
+        del self._train_anomaly_score
+
         self.threshold_       = self._get_threshold()
         self.contamination_   = self._get_contamination()
         self.random_variable_ = self._get_random_variable()
@@ -431,3 +444,95 @@ class BaseOutlierDetector(BaseEstimator, ABC):
         kwargs.setdefault('label', self.__class__.__name__)
 
         return plot_roc_curve(**kwargs)
+
+
+class NeighborsBufferMixin:
+    """Mixin class for detectors that search nearest neighbors in a tree,
+    ``estimator_``, and in a buffer of added samples. The buffer is searched
+    by brute force and merged into the tree once it exceeds 10% of the
+    samples in the tree."""
+
+    @property
+    def _metric_params(self):
+        if self.metric_params is None:
+            metric_params = dict()
+        else:
+            metric_params = self.metric_params.copy()
+
+        if self.metric == 'minkowski':
+            metric_params.setdefault('p', self.p)
+
+        return metric_params
+
+    @property
+    def _X_buffered(self):
+        return self._X_buffer[:self._n_buffer]
+
+    @property
+    def _n_reference(self):
+        n_tree, _ = self.estimator_._fit_X.shape
+
+        return n_tree + self._n_buffer
+
+    @property
+    def X_(self):
+        X_tree = self.estimator_._fit_X
+
+        if self._n_buffer == 0:
+            return X_tree
+        else:
+            return np.concatenate([X_tree, self._X_buffered])
+
+    def _init_buffer(self, X):
+        """Empty the buffer for samples like X."""
+
+        _, n_features  = X.shape
+        self._X_buffer = np.empty((0, n_features), dtype=X.dtype)
+        self._n_buffer = 0
+
+    def _append_to_buffer(self, X):
+        """Put the samples in the buffer, which grows in place."""
+
+        n_samples, _    = X.shape
+        n_buffer        = self._n_buffer + n_samples
+        self._X_buffer  = reserve_rows(self._X_buffer, n_buffer)
+        self._X_buffer[self._n_buffer:n_buffer] = X
+        self._n_buffer  = n_buffer
+
+    def _merge_buffer(self):
+        """Rebuild the tree with the buffer if the buffer is too large, and
+        return True if the tree was rebuilt."""
+
+        n_tree, _       = self.estimator_._fit_X.shape
+
+        if self._n_buffer <= MAX_BUFFER_RATIO * n_tree:
+            return False
+
+        self.estimator_.fit(self.X_)
+
+        self._n_buffer  = 0
+
+        return True
+
+    def _pairwise_distances(self, X, Y):
+        """Compute the distances between the samples in X and Y with the
+        same metric as the tree."""
+
+        return pairwise_distances(
+            X, Y, metric=self.metric, **self._metric_params
+        )
+
+    def _reference_rows(self, ind):
+        """Gather the reference samples with the given indices from the tree
+        and the buffer."""
+
+        X_tree             = self.estimator_._fit_X
+        n_tree, n_features = X_tree.shape
+        is_tree            = ind < n_tree
+        rows               = np.empty(
+            (ind.size, n_features), dtype=X_tree.dtype
+        )
+        rows[is_tree]      = X_tree[ind[is_tree]]
+        rows[~is_tree]     = self._X_buffer[ind[~is_tree] - n_tree]
+
+        return rows
@@ -1,10 +1,58 @@
-from sklearn.metrics.pairwise import rbf_kernel
+import numpy as np
+from scipy.linalg import solve_triangular
+from scipy.stats import norm
+from sklearn.exceptions import NotFittedError
+from sklearn.externals.joblib import delayed, Parallel
+from sklearn.kernel_approximation import Nystroem, RBFSampler
 from sklearn.svm import OneClassSVM
+from sklearn.utils import check_random_state, gen_batches
 from sklearn.utils.validation import check_is_fitted
 
 from .base import BaseOutlierDetector
+from ..utils import (
+    fast_pairwise_distances, get_chunk_n_rows, merge_moments
+)
 
-__all__ = ['OCSVM']
+__all__                    = ['EnsembleOCSVM', 'OCSVM', 'SGDOCSVM']
+
+INITIAL_EXPANSION_CAPACITY = 64
+
+
+def _rbf_kernel_dot(X, Y_scaled, Y_norm_squared_scaled, coef, gamma):
+    """Compute the product of the RBF kernel matrix between the given samples
+    and Y, and the given coefficients, from Y scaled by 2 * gamma and its
+    squared norms scaled by gamma. The exponent is built with one matrix
+    product and exponentiated in place."""
+
+    K  = X @ Y_scaled.T
+    K -= gamma * np.einsum('ij,ij->i', X, X)[:, np.newaxis]
+    K -= Y_norm_squared_scaled
+
+    # clip positive values due to rounding errors
+    np.minimum(K, 0., out=K)
+    np.exp(K, out=K)
+
+    return K @ coef
+
+
+def _sgd_step(Z, coef, rho, nu, learning_rate):
+    """Take a stochastic subgradient step on the primal problem of the linear
+    one-class SVM for a mini-batch."""
+
+    n_samples, _  = Z.shape
+    is_violated   = Z @ coef < rho
+    n_violated    = np.sum(is_violated)
+    coef          = (1. - learning_rate) * coef + learning_rate \
+        * np.sum(Z[is_violated], axis=0) / (nu * n_samples)
+    rho          += learning_rate * (1. - n_violated / (nu * n_samples))
+
+    return coef, rho
+
+
+def _fit_ocsvm(X, **params):
+    """Fit a one-class SVM on the given samples."""
+
+    return OCSVM(**params).fit(X)
 
 
 class OCSVM(BaseOutlierDetector):
@@ -22,6 +70,11 @@ class OCSVM(BaseOutlierDetector):
     max_iter : int, optional default -1
         Maximum number of iterations.
 
+    n_jobs : int, default 1
+        Number of threads to run in parallel when evaluating the kernel
+        expansion. If -1, then the number of threads is set to the number of
+        CPU cores.
+
     nu : float, default 0.5
         An upper bound on the fraction of training errors and a lower bound of
         the fraction of support vectors. Should be in the interval (0, 1].
@@ -29,6 +82,12 @@ class OCSVM(BaseOutlierDetector):
     random_state : int or RandomState instance, default None
         Seed of the pseudo random number generator.
 
+    reduction_tol : float, default None
+        If not None, the kernel expansion of the decision function is
+        approximated with a subset of the support vectors chosen greedily by
+        orthogonal matching pursuit, so that the anomaly score of any sample
+        changes by at most reduction_tol.
+
     shrinking : bool, default True
         If True, use the shrinking heuristic.
 
@@ -58,6 +117,24 @@ class OCSVM(BaseOutlierDetector):
     intercept_ : array-like of shape (1,)
         Constant in the decision function.
 
+    R2_ : float
+        Squared radius of the sphere enclosing the data in the feature
+        space, which is used as the threshold.
+
+    expansion_coef_ : array-like of shape (n_expansion,)
+        Coefficients of the vectors in the kernel expansion used for scoring.
+
+    expansion_vectors_ : array-like of shape (n_expansion, n_features)
+        Vectors in the kernel expansion used for scoring. Equal to the
+        support vectors if reduction_tol is None.
+
+    References
+    ----------
+    .. [#scholkopf99] Scholkopf, B., Mika, S., Burges, C. J. C., Knirsch, P.,
+        Muller, K.-R., Ratsch, G., and Smola, A. J.,
+        "Input space versus feature space in kernel-based methods,"
+        IEEE Transactions on Neural Networks, 10(5), pp. 1000-1017, 1999.
+
     Examples
     --------
     >>> import numpy as np
@@ -88,22 +165,37 @@ class OCSVM(BaseOutlierDetector):
         return self.estimator_.intercept_ / self.nu_l_
 
     def __init__(
-        self, cache_size=200, gamma='auto', max_iter=-1,
-        nu=0.5, shrinking=True, tol=0.001, random_state=None
+        self, cache_size=200, gamma='auto', max_iter=-1, n_jobs=1,
+        nu=0.5, reduction_tol=None, shrinking=True, tol=0.001,
+        random_state=None
     ):
-        self.cache_size   = cache_size
-        self.gamma        = gamma
-        self.max_iter     = max_iter
-        self.nu           = nu
-        self.shrinking    = shrinking
-        self.tol          = tol
-        self.random_state = random_state
+        self.cache_size    = cache_size
+        self.gamma         = gamma
+        self.max_iter      = max_iter
+        self.n_jobs        = n_jobs
+        self.nu            = nu
+        self.reduction_tol = reduction_tol
+        self.shrinking     = shrinking
+        self.tol           = tol
+        self.random_state  = random_state
+
+    def _check_params(self):
+        super()._check_params()
+
+        if self.reduction_tol is not None and self.reduction_tol <= 0.:
+            raise ValueError(
+                f'reduction_tol must be positive but was '
+                f'{self.reduction_tol}'
+            )
 
     def _check_is_fitted(self):
         super()._check_is_fitted()
 
         check_is_fitted(
-            self, ['dual_coef_', 'intercept_', 'support_', 'support_vectors_']
+            self, [
+                'dual_coef_', 'expansion_coef_', 'expansion_vectors_',
+                'intercept_', 'support_', 'support_vectors_'
+            ]
         )
 
     def _get_threshold(self):
@@ -122,15 +214,631 @@ class OCSVM(BaseOutlierDetector):
 
         l,               = self.support_.shape
         self.nu_l_       = self.nu * l
+        self.expansion_vectors_ = self.support_vectors_
+        self.expansion_coef_    = self.dual_coef_[0]
 
-        Q                = rbf_kernel(
-            self.support_vectors_, gamma=self.estimator_._gamma
-        )
-        c2               = (self.dual_coef_ @ Q @ self.dual_coef_.T)[0, 0]
+        # compute the squared norm of the center without materializing the
+        # kernel matrix between the support vectors
+        inner_product    = self._rbf_kernel_dot(self.support_vectors_)
+        c2               = self.expansion_coef_ @ inner_product
         self.R2_         = c2 + 2. * self.intercept_[0] + 1.
 
+        if self.reduction_tol is not None:
+            self._reduce(inner_product, c2)
+
         return self
 
     def _anomaly_score(self, X):
         return self.R2_ \
-            - 2. / self.nu_l_ * self.estimator_.decision_function(X).flat[:]
+            - 2. * (self._rbf_kernel_dot(X) + self.intercept_[0])
+
+    def _rbf_kernel_dot(self, X):
+        """Compute the kernel expansion of the given samples, a block of rows
+        at a time. Computation is done in float32 if X is float32."""
+
+        dtype            = np.result_type(X.dtype, np.float32)
+        X                = X.astype(dtype, copy=False)
+        n_samples, _     = X.shape
+        gamma            = dtype.type(self.estimator_._gamma)
+        Y                = self.expansion_vectors_.astype(dtype)
+        n_expansion, _   = Y.shape
+        coef             = self.expansion_coef_.astype(dtype)
+        norm_squared     = gamma * np.einsum('ij,ij->i', Y, Y)
+        Y               *= 2. * gamma
+        chunk_n_rows     = get_chunk_n_rows(
+            row_bytes    = dtype.itemsize * n_expansion,
+            max_n_rows   = n_samples
+        )
+
+        # BLAS and ufuncs release the GIL, so that threads avoid copying the
+        # expansion vectors to worker processes
+        return np.concatenate(Parallel(
+            n_jobs=self.n_jobs, backend='threading'
+        )(
+            delayed(_rbf_kernel_dot)(
+                X[s], Y, norm_squared, coef, gamma
+            ) for s in gen_batches(n_samples, chunk_n_rows)
+        ))
+
+    def _reduce(self, inner_product, c2):
+        """Approximate the center with a subset of the support vectors by
+        orthogonal matching pursuit, until the distance between the center
+        and its approximation is at most half of reduction_tol. Since every
+        sample has unit norm in the feature space, the anomaly score of any
+        sample then changes by at most reduction_tol."""
+
+        SV                    = self.support_vectors_
+        n_SV, _               = SV.shape
+        SV_norm_squared       = np.einsum('ij,ij->i', SV, SV)
+        gamma                 = self.estimator_._gamma
+        is_candidate          = np.ones(n_SV, dtype=bool)
+
+        # the kernel columns and the Cholesky factor of the selected vectors
+        # are stored in buffers that are extended in place and reallocated
+        # only when full
+        capacity              = min(n_SV, INITIAL_EXPANSION_CAPACITY)
+        selected              = np.empty(capacity, dtype=np.intp)
+        K                     = np.empty((n_SV, capacity), order='F')
+        L                     = np.zeros((capacity, capacity))
+        z                     = np.empty(capacity)
+        n_selected            = 0
+        coef                  = np.empty(0)
+        residual              = inner_product
+        residual_norm_squared = c2
+
+        while 4. * residual_norm_squared > self.reduction_tol ** 2 \
+                and np.any(is_candidate):
+            j                 = np.argmax(
+                np.where(is_candidate, np.abs(residual), -1.)
+            )
+            is_candidate[j]   = False
+            k                 = fast_pairwise_distances(
+                SV, SV[j:j + 1], squared=True,
+                Y_norm_squared=SV_norm_squared[j:j + 1]
+            )[:, 0]
+            k                *= -gamma
+
+            np.exp(k, out=k)
+
+            # extend the Cholesky factor of the kernel matrix of the selected
+            # vectors by one row, skipping vectors that are almost linearly
+            # dependent
+            if n_selected > 0:
+                v             = solve_triangular(
+                    L[:n_selected, :n_selected], k[selected[:n_selected]],
+                    lower=True
+                )
+            else:
+                v             = np.empty(0)
+
+            d2                = 1. - v @ v
+
+            if d2 <= np.finfo(np.float64).eps:
+                continue
+
+            if n_selected == capacity:
+                capacity      = min(n_SV, 2 * capacity)
+                selected      = np.resize(selected, capacity)
+                z             = np.resize(z, capacity)
+                K_old, L_old  = K, L
+                K             = np.empty((n_SV, capacity), order='F')
+                L             = np.zeros((capacity, capacity))
+                K[:, :n_selected]           = K_old
+                L[:n_selected, :n_selected] = L_old
+
+            d                 = np.sqrt(d2)
+            L[n_selected, :n_selected] = v
+            L[n_selected, n_selected]  = d
+            K[:, n_selected]  = k
+            z[n_selected]     = (
+                inner_product[j] - v @ z[:n_selected]
+            ) / d
+            selected[n_selected] = j
+            n_selected       += 1
+
+            # z solves L z = inner_product[selected], so that z @ z is the
+            # squared norm of the projection of the center
+            coef              = solve_triangular(
+                L[:n_selected, :n_selected], z[:n_selected], lower=True,
+                trans='T'
+            )
+            residual          = inner_product - K[:, :n_selected] @ coef
+            residual_norm_squared = c2 - z[:n_selected] @ z[:n_selected]
+
+        selected              = selected[:n_selected]
+
+        self.expansion_vectors_ = SV[selected]
+        self.expansion_coef_    = coef
+
+
+class SGDOCSVM(BaseOutlierDetector):
+    """One Class Support Vector Machines trained by stochastic gradient
+    descent on an approximate RBF feature map.
+
+    Samples are mapped to random Fourier features or Nystroem features, and
+    the primal problem of the linear one-class SVM in that space is solved
+    by averaged mini-batch stochastic subgradient descent. Training and
+    scoring are linear in the number of samples, and the cost of scoring is
+    fixed by the number of components.
+
+    Parameters
+    ----------
+    batch_size : int, default 256
+        Number of samples in each mini-batch.
+
+    eta0 : float, default 0.01
+        Initial learning rate for the 'constant' or 'invscaling' schedules.
+
+    gamma : float, default 'auto'
+        Kernel coefficient. If gamma is 'auto', 1 / n_features will be used
+        instead.
+
+    kernel_approximation : str, default 'rbf_sampler'
+        Kernel approximation to use. Valid approximations are
+        ['nystroem'|'rbf_sampler'].
+
+    learning_rate : str, default 'optimal'
+        Learning rate schedule. Valid schedules are
+        ['constant'|'invscaling'|'optimal']. If 'constant', eta = eta0. If
+        'invscaling', eta = eta0 / t ** power_t. If 'optimal',
+        eta = 1 / (t + 1), which suits the strongly convex objective.
+
+    max_iter : int, default 10
+        Number of passes over the training data.
+
+    n_components : int, default 100
+        Number of features of the kernel approximation.
+
+    nu : float, default 0.5
+        An upper bound on the fraction of training errors and a lower bound of
+        the fraction of support vectors. Should be in the interval (0, 1].
+
+    power_t : float, default 0.5
+        Exponent of the 'invscaling' schedule.
+
+    random_state : int or RandomState instance, default None
+        Seed of the pseudo random number generator.
+
+    Attributes
+    ----------
+    anomaly_score_ : array-like of shape (n_samples,)
+        Anomaly score for each training data, or for each sample in the last
+        batch after ``partial_fit``.
+
+    contamination_ : float
+        Actual proportion of outliers in the data set, or in all the samples
+        seen after ``partial_fit``.
+
+    threshold_ : float
+        Threshold.
+
+    coef_ : array-like of shape (n_components,)
+        Center of the data in the approximate feature space, averaged over
+        iterations by ``fit``.
+
+    intercept_ : array-like of shape (1,)
+        Constant in the decision function.
+
+    R2_ : float
+        Squared radius of the sphere enclosing the data in the approximate
+        feature space, which is used as the threshold.
+
+    estimator_ : object
+        Fitted kernel approximation.
+
+    n_iter_ : int
+        Number of mini-batch updates.
+
+    n_samples_seen_ : int
+        Number of samples whose anomaly scores are summarized in
+        ``contamination_`` and ``random_variable_``.
+
+    References
+    ----------
+    .. [#rahimi08] Rahimi, A., and Recht, B.,
+        "Random features for large-scale kernel machines,"
+        Advances in NIPS, pp. 1177-1184, 2008.
+
+    .. [#scholkopf01] Scholkopf, B., Platt, J. C., Shawe-Taylor, J. C.,
+        Smola, A. J., and Williamson, R. C.,
+        "Estimating the Support of a High-Dimensional Distribution,"
+        Neural Computation, 13(7), pp. 1443-1471, 2001.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from kenchi.outlier_detection import SGDOCSVM
+    >>> X = np.array([
+    ...     [0., 0.], [1., 1.], [2., 0.], [3., -1.], [4., 0.],
+    ...     [5., 1.], [6., 0.], [7., -1.], [8., 0.], [1000., 1.]
+    ... ])
+    >>> det = SGDOCSVM(gamma=1e-03, nu=0.1, random_state=0)
+    >>> det.fit_predict(X)
+    array([ 1,  1,  1,  1,  1,  1,  1,  1,  1, -1])
+    """
+
+    def __init__(
+        self, batch_size=256, eta0=0.01, gamma='auto',
+        kernel_approximation='rbf_sampler', learning_rate='optimal',
+        max_iter=10, n_components=100, nu=0.5, power_t=0.5,
+        random_state=None
+    ):
+        self.batch_size           = batch_size
+        self.eta0                 = eta0
+        self.gamma                = gamma
+        self.kernel_approximation = kernel_approximation
+        self.learning_rate        = learning_rate
+        self.max_iter             = max_iter
+        self.n_components         = n_components
+        self.nu                   = nu
+        self.power_t              = power_t
+        self.random_state         = random_state
+
+    def _check_params(self):
+        super()._check_params()
+
+        if self.batch_size <= 0:
+            raise ValueError(
+                f'batch_size must be positive but was {self.batch_size}'
+            )
+
+        if self.eta0 <= 0.:
+            raise ValueError(f'eta0 must be positive but was {self.eta0}')
+
+        if self.kernel_approximation not in ['nystroem', 'rbf_sampler']:
+            raise ValueError(
+                f'invalid kernel_approximation '
+                f'{self.kernel_approximation}'
+            )
+
+        if self.learning_rate not in ['constant', 'invscaling', 'optimal']:
+            raise ValueError(f'invalid learning_rate {self.learning_rate}')
+
+        if self.max_iter <= 0:
+            raise ValueError(
+                f'max_iter must be positive but was {self.max_iter}'
+            )
+
+        if self.n_components <= 0:
+            raise ValueError(
+                f'n_components must be positive but was {self.n_components}'
+            )
+
+        if not 0. < self.nu <= 1.:
+            raise ValueError(f'nu must be in (0, 1] but was {self.nu}')
+
+    def _check_is_fitted(self):
+        super()._check_is_fitted()
+
+        check_is_fitted(self, ['coef_', 'estimator_', 'intercept_'])
+
+    def _get_threshold(self):
+        return self.R2_
+
+    def _fit(self, X):
+        n_samples, n_features = X.shape
+        rnd                   = check_random_state(self.random_state)
+
+        if self.gamma == 'auto':
+            gamma             = 1. / n_features
+        else:
+            gamma             = self.gamma
+
+        if self.kernel_approximation == 'nystroem':
+            self.estimator_   = Nystroem(
+                gamma         = gamma,
+                n_components  = self.n_components,
+                random_state  = rnd
+            ).fit(X)
+        else:
+            self.estimator_   = RBFSampler(
+                gamma         = gamma,
+                n_components  = self.n_components,
+                random_state  = rnd
+            ).fit(X)
+
+        Z                     = self.estimator_.transform(X)
+        _, n_components       = Z.shape
+        coef                  = np.zeros(n_components)
+        rho                   = 0.
+        n_averaged            = 0
+        self.coef_            = np.zeros(n_components)
+        self.n_iter_          = 0
+
+        for epoch in range(self.max_iter):
+            Z_shuffled        = Z[rnd.permutation(n_samples)]
+
+            for s in gen_batches(n_samples, self.batch_size):
+                self.n_iter_ += 1
+                coef, rho     = _sgd_step(
+                    Z_shuffled[s], coef, rho, self.nu,
+                    self._get_learning_rate()
+                )
+
+                # average the iterates after the first pass
+                if epoch > 0 or self.max_iter == 1:
+                    n_averaged  += 1
+                    self.coef_  += (coef - self.coef_) / n_averaged
+
+        # the optimal offset for the averaged center is the nu-quantile of
+        # the inner products with the training data
+        inner_product         = Z @ self.coef_
+        self.intercept_       = np.array([
+            -np.percentile(inner_product, 100. * self.nu)
+        ])
+        c2                    = self.coef_ @ self.coef_
+        self.R2_              = c2 + 2. * self.intercept_[0] + 1.
+        anomaly_score         = 1. + c2 - 2. * inner_product
+
+        # summarize the anomaly scores for partial_fit
+        self.n_samples_seen_  = n_samples
+        self._n_outliers      = np.sum(anomaly_score > self.R2_)
+        self._score_mean      = np.mean(anomaly_score)
+        self._score_m2        = np.sum(
+            (anomaly_score - self._score_mean) ** 2
+        )
+
+        self._train_anomaly_score = anomaly_score
+
+        return self
+
+    def _anomaly_score(self, X):
+        return 1. + self.coef_ @ self.coef_ \
+            - 2. * self.estimator_.transform(X) @ self.coef_
+
+    def _get_learning_rate(self):
+        """Get the learning rate of the current update."""
+
+        if self.learning_rate == 'constant':
+            return self.eta0
+
+        if self.learning_rate == 'invscaling':
+            return self.eta0 / self.n_iter_ ** self.power_t
+
+        return 1. / (self.n_iter_ + 1.)
+
+    def partial_fit(self, X, y=None):
+        """Update the model with a batch of samples.
+
+        The kernel approximation is fitted on the first batch. After that,
+        each mini-batch of the batch takes one stochastic subgradient step on
+        both the center and the offset, starting from the current model. A
+        mini-batch smaller than ``batch_size`` takes a proportionally smaller
+        step, so that feeding samples one at a time does not outweigh larger
+        batches. Iterates are not averaged, so that the model can follow
+        drifting data with the 'constant' schedule. The mean and the variance
+        of the anomaly scores, and the proportion of outliers, are merged with
+        those of the batch.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features)
+            Batch of samples.
+
+        y : ignored
+
+        Returns
+        -------
+        self : object
+            Return self.
+        """
+
+        try:
+            self._check_is_fitted()
+        except NotFittedError:
+            return self.fit(X)
+
+        X                     = self._check_array(X, estimator=self)
+        n_samples, _          = X.shape
+        Z                     = self.estimator_.transform(X)
+        rho                   = -self.intercept_[0]
+
+        for s in gen_batches(n_samples, self.batch_size):
+            self.n_iter_     += 1
+            learning_rate     = self._get_learning_rate() \
+                * (s.stop - s.start) / self.batch_size
+            self.coef_, rho   = _sgd_step(
+                Z[s], self.coef_, rho, self.nu, learning_rate
+            )
+
+        # the offset is kept from the subgradient steps rather than reset to
+        # the quantile of the batch, which is unreliable for small batches
+        self.intercept_       = np.array([-rho])
+        c2                    = self.coef_ @ self.coef_
+        self.R2_              = c2 + 2. * self.intercept_[0] + 1.
+        anomaly_score         = 1. + c2 - 2. * Z @ self.coef_
+        n_samples_seen, self._score_mean, self._score_m2 = merge_moments(
+            self.n_samples_seen_, self._score_mean, self._score_m2,
+            anomaly_score
+        )
+        self._n_outliers     += np.sum(anomaly_score > self.R2_)
+
+        self.anomaly_score_   = anomaly_score
+        self.threshold_       = self._get_threshold()
+        self.n_samples_seen_  = n_samples_seen
+        self.contamination_   = self._n_outliers / self.n_samples_seen_
+        self.random_variable_ = norm(
+            loc=self._score_mean,
+            scale=np.sqrt(self._score_m2 / self.n_samples_seen_)
+        )
+
+        return self
+
+
+class EnsembleOCSVM(BaseOutlierDetector):
+    """Ensemble of One Class Support Vector Machines (only RBF kernel)
+    trained on chunks of the data.
+
+    Each one-class SVM is trained on a disjoint chunk or on a bootstrap
+    sample of the data, in parallel. The anomaly score is the average of
+    the squared distances to the centers divided by the squared radii, so
+    that the threshold is 1. If ``cascade`` is True, a single one-class SVM is
+    retrained on the union of the support vectors of the chunks instead.
+
+    Parameters
+    ----------
+    bootstrap : bool, default False
+        If True, individual models are fit on random subsets of the training
+        data sampled with replacement. If False, the training data is split
+        into disjoint chunks.
+
+    cache_size : float, default 200
+        Specify the size of the kernel cache (in MB).
+
+    cascade : bool, default False
+        If True, a single model is retrained on the union of the support
+        vectors of the individual models, with nu scaled so that the number
+        of bounded support vectors is kept.
+
+    gamma : float, default 'auto'
+        Kernel coefficient. If gamma is 'auto', 1 / n_features will be used
+        instead.
+
+    max_iter : int, optional default -1
+        Maximum number of iterations.
+
+    n_estimators : int, default 10
+        Number of models in the ensemble.
+
+    n_jobs : int, default 1
+        Number of jobs to run in parallel. If -1, then the number of jobs is
+        set to the number of CPU cores.
+
+    nu : float, default 0.5
+        An upper bound on the fraction of training errors and a lower bound of
+        the fraction of support vectors. Should be in the interval (0, 1].
+
+    random_state : int or RandomState instance, default None
+        Seed of the pseudo random number generator.
+
+    shrinking : bool, default True
+        If True, use the shrinking heuristic.
+
+    tol : float, default 0.001
+        Tolerance to declare convergence.
+
+    Attributes
+    ----------
+    anomaly_score_ : array-like of shape (n_samples,)
+        Anomaly score for each training data.
+
+    contamination_ : float
+        Actual proportion of outliers in the data set.
+
+    threshold_ : float
+        Threshold.
+
+    estimators_ : list
+        Fitted models, or the retrained model if cascade is True. The
+        anomaly score of each model is divided by its squared radius
+        ``R2_`` before averaging, so that the threshold is 1.
+
+    References
+    ----------
+    .. [#graf05] Graf, H. P., Cosatto, E., Bottou, L., Dourdanovic, I., and
+        Vapnik, V.,
+        "Parallel support vector machines: The cascade SVM,"
+        Advances in NIPS, pp. 521-528, 2005.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from kenchi.outlier_detection import EnsembleOCSVM
+    >>> X = np.array([
+    ...     [0., 0.], [1., 1.], [2., 0.], [3., -1.], [4., 0.],
+    ...     [5., 1.], [6., 0.], [7., -1.], [8., 0.], [1000., 1.]
+    ... ])
+    >>> det = EnsembleOCSVM(
+    ...     cascade=True, gamma=1e-03, n_estimators=2, nu=0.25, random_state=0
+    ... )
+    >>> det.fit_predict(X)
+    array([ 1,  1,  1,  1,  1,  1,  1,  1,  1, -1])
+    """
+
+    def __init__(
+        self, bootstrap=False, cache_size=200, cascade=False, gamma='auto',
+        max_iter=-1, n_estimators=10, n_jobs=1, nu=0.5, shrinking=True,
+        tol=0.001, random_state=None
+    ):
+        self.bootstrap    = bootstrap
+        self.cache_size   = cache_size
+        self.cascade      = cascade
+        self.gamma        = gamma
+        self.max_iter     = max_iter
+        self.n_estimators = n_estimators
+        self.n_jobs       = n_jobs
+        self.nu           = nu
+        self.shrinking    = shrinking
+        self.tol          = tol
+        self.random_state = random_state
+
+    def _check_params(self):
+        super()._check_params()
+
+        if self.n_estimators <= 0:
+            raise ValueError(
+                f'n_estimators must be positive but was {self.n_estimators}'
+            )
+
+    def _check_is_fitted(self):
+        super()._check_is_fitted()
+
+        check_is_fitted(self, 'estimators_')
+
+    def _get_threshold(self):
+        return 1.
+
+    def _fit(self, X):
+        n_samples, n_features = X.shape
+        rnd                   = check_random_state(self.random_state)
+        n_estimators          = np.minimum(self.n_estimators, n_samples)
+
+        if self.gamma == 'auto':
+            gamma             = 1. / n_features
+        else:
+            gamma             = self.gamma
+
+        params                = {
+            'cache_size':       self.cache_size,
+            'gamma':            gamma,
+            'max_iter':         self.max_iter,
+            'nu':               self.nu,
+            'shrinking':        self.shrinking,
+            'tol':              self.tol
+        }
+
+        if self.bootstrap:
+            chunks            = rnd.randint(
+                n_samples, size=(n_estimators, n_samples // n_estimators)
+            )
+        else:
+            chunks            = np.array_split(
+                rnd.permutation(n_samples), n_estimators
+            )
+
+        self.estimators_      = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_ocsvm)(
+                X[chunk], random_state=rnd.randint(np.iinfo(np.int32).max),
+                **params
+            ) for chunk in chunks
+        )
+
+        if self.cascade:
+            X_SV              = np.concatenate([
+                est.support_vectors_ for est in self.estimators_
+            ])
+            n_SV, _           = X_SV.shape
+            params['nu']      = np.minimum(1., self.nu * n_samples / n_SV)
+            self.estimators_  = [
+                _fit_ocsvm(
+                    X_SV, random_state=rnd.randint(np.iinfo(np.int32).max),
+                    **params
+                )
+            ]
+
+        return self
+
+    def _anomaly_score(self, X):
+        return np.mean([
+            est._anomaly_score(X) / est.R2_ for est in self.estimators_
+        ], axis=0)
@@ -1,10 +1,266 @@
 import numpy as np
+import scipy.sparse as sp
+from scipy.stats import norm
 from sklearn.cluster import MiniBatchKMeans as _MiniBatchKMeans
+from sklearn.exceptions import NotFittedError
+from sklearn.externals.joblib import delayed, Parallel
+from sklearn.neighbors import KDTree
+from sklearn.utils import check_random_state, gen_batches
 from sklearn.utils.validation import check_is_fitted
 
 from .base import BaseOutlierDetector
+from ..utils import (
+    fast_pairwise_distances, get_chunk_n_rows, merge_moments
+)
 
-__all__ = ['MiniBatchKMeans']
+__all__             = ['MiniBatchKMeans']
+
+MAX_N_FEATURES_TREE = 5
+MIN_N_CLUSTERS_TREE = 256
+N_LLOYD_ITER        = 5
+N_ROUNDS            = 2
+OVERSAMPLING_FACTOR = 2.
+
+
+def _nearest_center(X, cluster_centers, norm_squared=None, tree=None):
+    """Find the nearest cluster center of each sample and the squared
+    distance to it, with the k-d tree of the cluster centers if given or a
+    block of rows at a time otherwise. Distances are computed in the dtype
+    of X, so that float32 data is not upcast."""
+
+    if tree is not None:
+        dist, ind      = tree.query(X, k=1)
+
+        return ind[:, 0], dist[:, 0] ** 2
+
+    n_samples, _       = X.shape
+    n_clusters, _      = cluster_centers.shape
+    dtype              = np.result_type(X.dtype, np.float32)
+
+    if norm_squared is None:
+        norm_squared   = np.einsum(
+            'ij,ij->i', cluster_centers, cluster_centers
+        )
+
+    chunk_n_rows       = get_chunk_n_rows(
+        row_bytes      = dtype.itemsize * n_clusters,
+        max_n_rows     = n_samples
+    )
+    labels             = np.empty(n_samples, dtype=np.intp)
+    min_dist           = np.empty(n_samples, dtype=dtype)
+
+    for s in gen_batches(n_samples, chunk_n_rows):
+        dist           = fast_pairwise_distances(
+            X[s].astype(dtype, copy=False), cluster_centers, squared=True,
+            Y_norm_squared=norm_squared
+        )
+        labels[s]      = np.argmin(dist, axis=1)
+        min_dist[s]    = dist[np.arange(labels[s].size), labels[s]]
+
+    return labels, min_dist
+
+
+def _index_centers(cluster_centers, algorithm, leaf_size):
+    """Build the k-d tree of the cluster centers, or return None if the
+    algorithm is brute."""
+
+    if algorithm == 'kd_tree':
+        return KDTree(cluster_centers, leaf_size=leaf_size)
+
+    return None
+
+
+def _sample(potential, size, random_state):
+    """Draw indices with probability proportional to the potential."""
+
+    cumulative         = np.cumsum(potential)
+    ind                = np.searchsorted(
+        cumulative, cumulative[-1] * random_state.uniform(size=size),
+        side='right'
+    )
+
+    return np.minimum(ind, potential.size - 1)
+
+
+def _squared_distances(X, norm_squared, ind):
+    """Compute the squared distances from each sample to the samples with the
+    given indices, reusing the squared norms of the samples."""
+
+    dist               = X @ (-2. * X[ind].T)
+    dist              += norm_squared[:, np.newaxis]
+    dist              += norm_squared[ind]
+
+    return np.maximum(dist, 0., out=dist)
+
+
+def _k_means_plusplus(
+    X, n_clusters, random_state, sample_weight=None, n_local_trials=None
+):
+    """Choose the indices of the initial cluster centers by greedy k-means++
+    seeding, where several candidates are drawn with probability
+    proportional to their weights times their squared distances to the
+    nearest chosen center, and the one that most reduces the potential is
+    chosen. With a single trial, this is plain k-means++ seeding."""
+
+    n_samples, _       = X.shape
+
+    if sample_weight is None:
+        sample_weight  = np.ones(n_samples)
+
+    if n_local_trials is None:
+        n_local_trials = 2 + int(np.log(n_clusters))
+
+    norm_squared       = np.einsum('ij,ij->i', X, X)
+    centers            = np.empty(n_clusters, dtype=np.intp)
+    centers[0]         = _sample(sample_weight, 1, random_state)
+    min_dist           = _squared_distances(X, norm_squared, centers[:1])[:, 0]
+
+    for i in range(1, n_clusters):
+        potential      = sample_weight * min_dist
+
+        # fall back to uniform sampling when every sample is covered
+        if np.sum(potential) == 0.:
+            potential  = np.ones(n_samples)
+            potential[centers[:i]] = 0.
+
+        trials         = _sample(potential, n_local_trials, random_state)
+        dist           = _squared_distances(X, norm_squared, trials)
+
+        np.minimum(dist, min_dist[:, np.newaxis], out=dist)
+
+        best           = np.argmin(sample_weight @ dist)
+        centers[i]     = trials[best]
+        min_dist       = dist[:, best]
+
+    return centers
+
+
+def _weighted_lloyd(X, sample_weight, cluster_centers, algorithm, leaf_size):
+    """Refine the cluster centers by a few iterations of Lloyd's algorithm
+    on the weighted samples."""
+
+    n_samples, _       = X.shape
+    n_clusters, _      = cluster_centers.shape
+
+    for _ in range(N_LLOYD_ITER):
+        labels, _      = _nearest_center(
+            X, cluster_centers,
+            tree=_index_centers(cluster_centers, algorithm, leaf_size)
+        )
+        assignment     = sp.csr_matrix(
+            (sample_weight, (labels, np.arange(n_samples))),
+            shape=(n_clusters, n_samples)
+        )
+        weight         = np.bincount(
+            labels, weights=sample_weight, minlength=n_clusters
+        )
+        is_nonempty    = weight > 0.
+
+        # keep the centers that no sample is nearest to
+        cluster_centers = cluster_centers.copy()
+        cluster_centers[is_nonempty] = (assignment @ X)[is_nonempty] \
+            / weight[is_nonempty, np.newaxis]
+
+    return cluster_centers
+
+
+def _k_means_parallel(
+    X, n_clusters, random_state, algorithm='brute', leaf_size=30
+):
+    """Choose the initial cluster centers by k-means|| seeding, where
+    candidates are oversampled in a few rounds over the data, weighted by
+    the number of samples nearest to them and reclustered by k-means++
+    followed by weighted Lloyd iterations."""
+
+    n_samples, _       = X.shape
+    candidates         = random_state.randint(n_samples, size=1)
+    _, min_dist        = _nearest_center(X, X[candidates])
+
+    for _ in range(N_ROUNDS):
+        potential      = np.sum(min_dist)
+
+        if potential == 0.:
+            break
+
+        is_sampled     = random_state.uniform(size=n_samples) < \
+            OVERSAMPLING_FACTOR * n_clusters * min_dist / potential
+        sampled        = np.flatnonzero(is_sampled)
+
+        if sampled.size == 0:
+            continue
+
+        _, dist        = _nearest_center(
+            X, X[sampled],
+            tree=_index_centers(X[sampled], algorithm, leaf_size)
+        )
+        candidates     = np.union1d(candidates, sampled)
+
+        np.minimum(min_dist, dist, out=min_dist)
+
+    n_candidates,      = candidates.shape
+
+    if n_candidates <= n_clusters:
+        rest           = np.setdiff1d(np.arange(n_samples), candidates)
+        candidates     = np.concatenate([
+            candidates, random_state.choice(
+                rest, n_clusters - n_candidates, replace=False
+            )
+        ])
+
+        return X[candidates]
+
+    labels, _          = _nearest_center(
+        X, X[candidates],
+        tree=_index_centers(X[candidates], algorithm, leaf_size)
+    )
+    sample_weight      = np.bincount(labels, minlength=n_candidates)
+    X_candidates       = X[candidates]
+    centers            = _k_means_plusplus(
+        X_candidates, n_clusters, random_state,
+        n_local_trials = 1,
+        sample_weight  = sample_weight
+    )
+
+    return _weighted_lloyd(
+        X_candidates, sample_weight, X_candidates[centers], algorithm,
+        leaf_size
+    )
+
+
+def _init_centers(
+    X, X_valid, n_clusters, init, init_size, algorithm, leaf_size,
+    random_state
+):
+    """Initialize the cluster centers and compute the inertia on the
+    validation samples. 'k-means++' and 'random' are performed on
+    ``init_size`` random samples, and 'k-means||' on all the samples."""
+
+    random_state       = check_random_state(random_state)
+
+    if init == 'k-means||':
+        cluster_centers = _k_means_parallel(
+            X, n_clusters, random_state,
+            algorithm  = algorithm,
+            leaf_size  = leaf_size
+        )
+    else:
+        n_samples, _   = X.shape
+        X_init         = X[
+            random_state.choice(n_samples, init_size, replace=False)
+        ]
+
+        if init == 'k-means++':
+            centers    = _k_means_plusplus(X_init, n_clusters, random_state)
+        else:
+            centers    = random_state.choice(
+                init_size, n_clusters, replace=False
+            )
+
+        cluster_centers = X_init[centers]
+
+    _, min_dist        = _nearest_center(X_valid, cluster_centers)
+
+    return cluster_centers, np.sum(min_dist)
 
 
 class MiniBatchKMeans(BaseOutlierDetector):
@@ -12,6 +268,11 @@ class MiniBatchKMeans(BaseOutlierDetector):
 
     Parameters
     ----------
+    algorithm : str, default 'auto'
+        Algorithm used to find the nearest cluster center. Valid algorithms
+        are ['auto'|'brute'|'kd_tree']. If 'auto', a k-d tree is used when
+        there are many clusters in a low-dimensional space.
+
     batch_size : int, optional, default 100
         Size of the mini batches.
 
@@ -19,12 +280,19 @@ class MiniBatchKMeans(BaseOutlierDetector):
         Proportion of outliers in the data set. Used to define the threshold.
 
     init : str or array-like, default 'k-means++'
-        Method for initialization. Valid options are ['k-means++'|'random'].
+        Method for initialization. Valid options are
+        ['k-means++'|'k-means||'|'random']. 'k-means++' and 'random' are
+        performed on ``init_size`` random samples. 'k-means||' oversamples
+        candidates in a few rounds over all the data, which is slower than
+        seeding on a subsample but less likely to miss small clusters.
 
     init_size : int, default: 3 * batch_size
         Number of samples to randomly sample for speeding up the
         initialization.
 
+    leaf_size : int, default 30
+        Leaf size of the k-d tree.
+
     max_iter : int, default 100
         Maximum number of iterations.
 
@@ -37,7 +305,12 @@ class MiniBatchKMeans(BaseOutlierDetector):
         Number of clusters.
 
     n_init : int, default 3
-        Number of initializations to perform.
+        Number of initializations to perform. The initialization with the
+        smallest inertia on ``init_size`` random samples is used.
+
+    n_jobs : int, default 1
+        Number of jobs to run the initializations in parallel. If -1, then
+        the number of jobs is set to the number of CPU cores.
 
     random_state : int or RandomState instance, default None
         Seed of the pseudo random number generator.
@@ -51,14 +324,20 @@ class MiniBatchKMeans(BaseOutlierDetector):
 
     Attributes
     ----------
+    algorithm_ : str
+        Actual algorithm used to find the nearest cluster center.
+
     anomaly_score_ : array-like of shape (n_samples,)
-        Anomaly score for each training data.
+        Anomaly score for each training data, or for each sample in the last
+        batch after ``partial_fit``.
 
     contamination_ : float
         Actual proportion of outliers in the data set.
 
     threshold_ : float
-        Threshold.
+        Threshold. After ``partial_fit``, the average of the thresholds of
+        all batches weighted by their sizes, which approximates the
+        threshold of all the samples seen so far.
 
     cluster_centers_ : array-like of shape (n_clusters, n_features)
         Coordinates of cluster centers.
@@ -69,6 +348,13 @@ class MiniBatchKMeans(BaseOutlierDetector):
     labels_ : array-like of shape (n_samples,)
         Label of each point.
 
+    tree_ : KDTree or None
+        k-d tree of the cluster centers, or None if the algorithm is brute.
+
+    n_samples_seen_ : int
+        Number of samples whose anomaly scores are summarized in
+        ``threshold_`` and ``random_variable_``.
+
     Examples
     --------
     >>> import numpy as np
@@ -95,42 +381,205 @@ class MiniBatchKMeans(BaseOutlierDetector):
         return self.estimator_.labels_
 
     def __init__(
-        self, batch_size=100, contamination=0.1, init='k-means++',
-        init_size=None, max_iter=100, max_no_improvement=10, n_clusters=8,
-        n_init=3, random_state=None, reassignment_ratio=0.01, tol=0.0
+        self, algorithm='auto', batch_size=100, contamination=0.1,
+        init='k-means++', init_size=None, leaf_size=30, max_iter=100,
+        max_no_improvement=10, n_clusters=8, n_init=3, n_jobs=1,
+        random_state=None, reassignment_ratio=0.01, tol=0.0
     ):
+        self.algorithm          = algorithm
         self.batch_size         = batch_size
         self.contamination      = contamination
         self.init               = init
         self.init_size          = init_size
+        self.leaf_size          = leaf_size
         self.max_iter           = max_iter
         self.max_no_improvement = max_no_improvement
         self.n_clusters         = n_clusters
         self.n_init             = n_init
+        self.n_jobs             = n_jobs
         self.random_state       = random_state
         self.reassignment_ratio = reassignment_ratio
         self.tol                = tol
 
+    def _check_params(self):
+        super()._check_params()
+
+        if self.algorithm not in ['auto', 'brute', 'kd_tree']:
+            raise ValueError(f'invalid algorithm {self.algorithm}')
+
+        if isinstance(self.init, str) \
+                and self.init not in ['k-means++', 'k-means||', 'random']:
+            raise ValueError(f'invalid init {self.init}')
+
+        if self.n_init <= 0:
+            raise ValueError(f'n_init must be positive but was {self.n_init}')
+
     def _check_is_fitted(self):
         super()._check_is_fitted()
 
-        check_is_fitted(self, ['cluster_centers_', 'inertia_', 'labels_'])
+        check_is_fitted(
+            self, ['algorithm_', 'cluster_centers_', 'inertia_', 'labels_']
+        )
+
+    def _get_algorithm(self, n_features):
+        """Get the algorithm used to find the nearest cluster center."""
+
+        if self.algorithm != 'auto':
+            return self.algorithm
+
+        # trees are no faster than brute-force search in high dimensions
+        if self.n_clusters >= MIN_N_CLUSTERS_TREE \
+                and n_features <= MAX_N_FEATURES_TREE:
+            return 'kd_tree'
+
+        return 'brute'
+
+    def _index_cluster_centers(self):
+        """Build the structure used to find the nearest cluster center."""
+
+        _, n_features         = self.cluster_centers_.shape
+        self.algorithm_       = self._get_algorithm(n_features)
+
+        if self.algorithm_ == 'kd_tree':
+            self.tree_        = KDTree(
+                self.cluster_centers_, leaf_size=self.leaf_size
+            )
+        else:
+            self.tree_        = None
+
+        self._cluster_centers_norm_squared = np.einsum(
+            'ij,ij->i', self.cluster_centers_, self.cluster_centers_
+        )
 
     def _fit(self, X):
+        if isinstance(self.init, str):
+            init               = self._init_centers(X)
+        else:
+            init               = self.init
+
         self.estimator_        = _MiniBatchKMeans(
             batch_size         = self.batch_size,
-            init               = self.init,
+            init               = init,
             init_size          = self.init_size,
             max_iter           = self.max_iter,
             max_no_improvement = self.max_no_improvement,
             n_clusters         = self.n_clusters,
-            n_init             = self.n_init,
+            n_init             = 1,
             random_state       = self.random_state,
             reassignment_ratio = self.reassignment_ratio,
             tol                = self.tol
         ).fit(X)
 
+        self._index_cluster_centers()
+
+        # summarize the anomaly scores for partial_fit
+        anomaly_score          = self._anomaly_score(X)
+        self.n_samples_seen_,  = anomaly_score.shape
+        self._score_mean       = np.mean(anomaly_score)
+        self._score_m2         = np.sum(
+            (anomaly_score - self._score_mean) ** 2
+        )
+
+        self._train_anomaly_score = anomaly_score
+
         return self
 
+    def _init_centers(self, X):
+        """Run the initializations in parallel and return the cluster
+        centers with the smallest inertia on the validation samples."""
+
+        n_samples, n_features  = X.shape
+        rnd                    = check_random_state(self.random_state)
+
+        if self.init_size is None:
+            init_size          = 3 * self.batch_size
+        else:
+            init_size          = self.init_size
+
+        if init_size < self.n_clusters:
+            init_size          = 3 * self.n_clusters
+
+        init_size              = np.minimum(init_size, n_samples)
+        X_valid                = X[
+            rnd.choice(n_samples, init_size, replace=False)
+        ]
+        seeds                  = rnd.randint(
+            np.iinfo(np.int32).max, size=self.n_init
+        )
+        results                = Parallel(n_jobs=self.n_jobs)(
+            delayed(_init_centers)(
+                X, X_valid, self.n_clusters, self.init, init_size,
+                self._get_algorithm(n_features), self.leaf_size, seed
+            ) for seed in seeds
+        )
+        cluster_centers, _     = min(results, key=lambda result: result[1])
+
+        return cluster_centers
+
     def _anomaly_score(self, X):
-        return np.min(self.estimator_.transform(X), axis=1)
+        _, min_dist           = _nearest_center(
+            X, self.cluster_centers_,
+            norm_squared      = self._cluster_centers_norm_squared,
+            tree              = self.tree_
+        )
+
+        # take the square root after the min-reduction
+        return np.sqrt(min_dist, out=min_dist)
+
+    def partial_fit(self, X, y=None):
+        """Update the model with a batch of samples.
+
+        The cluster centers are updated with the batch. The mean and the
+        variance of the anomaly scores are merged with those of the batch,
+        and the threshold is merged with the threshold of the batch, so that
+        past samples need not be kept.
+
+        The merged threshold only approximates the threshold of all the
+        samples seen so far. The average of the quantiles of the batches is
+        not the quantile of their union, and the scores of past batches are
+        not updated as the centers move. The approximation is reasonable for
+        batches much larger than ``1 / contamination`` samples, but may be
+        far off for small batches.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features)
+            Batch of samples.
+
+        y : ignored
+
+        Returns
+        -------
+        self : object
+            Return self.
+        """
+
+        try:
+            self._check_is_fitted()
+        except NotFittedError:
+            return self.fit(X)
+
+        X                     = self._check_array(X, estimator=self)
+
+        self.estimator_.partial_fit(X)
+        self._index_cluster_centers()
+
+        anomaly_score         = self._anomaly_score(X)
+        n_samples, _          = X.shape
+        n_samples_seen, self._score_mean, self._score_m2 = merge_moments(
+            self.n_samples_seen_, self._score_mean, self._score_m2,
+            anomaly_score
+        )
+
+        self.anomaly_score_   = anomaly_score
+        self.threshold_      += (
+            self._get_threshold() - self.threshold_
+        ) * n_samples / n_samples_seen
+        self.n_samples_seen_  = n_samples_seen
+        self.contamination_   = self._get_contamination()
+        self.random_variable_ = norm(
+            loc=self._score_mean,
+            scale=np.sqrt(self._score_m2 / self.n_samples_seen_)
+        )
+
+        return self
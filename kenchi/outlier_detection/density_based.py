@@ -1,13 +1,102 @@
 import numpy as np
-from sklearn.neighbors import LocalOutlierFactor
+from sklearn.externals.joblib import delayed, Parallel
+from sklearn.neighbors import NearestNeighbors
+from sklearn.utils import gen_batches
 from sklearn.utils.validation import check_is_fitted
 
-from .base import BaseOutlierDetector
+from .base import BaseOutlierDetector, NeighborsBufferMixin
+from ..utils import get_chunk_n_rows, reserve_rows
 
-__all__ = ['LOF']
+__all__       = ['LOF', 'MultiLOF']
 
+MAX_FAR_RATIO = 0.05
+RADIUS_RTOL   = 1e-06
 
-class LOF(BaseOutlierDetector):
+# orders of the norms of the metrics that admit partitioning
+MINKOWSKI_P   = {
+    'chebyshev': np.inf,
+    'cityblock': 1,
+    'euclidean': 2,
+    'l1':        1,
+    'l2':        2,
+    'manhattan': 1,
+    'minkowski': None
+}
+
+
+def _partition(X, n_partitions):
+    """Split the data into cells by repeatedly halving the largest cell at
+    the median of its widest dimension."""
+
+    n_samples, _ = X.shape
+    cells        = [np.arange(n_samples)]
+
+    while len(cells) < n_partitions:
+        i        = np.argmax([ind.size for ind in cells])
+        ind      = cells.pop(i)
+        X_cell   = X[ind]
+        order    = np.argsort(X_cell[:, np.argmax(np.ptp(X_cell, axis=0))])
+        half     = ind.size // 2
+
+        cells   += [ind[order[:half]], ind[order[half:]]]
+
+    return cells
+
+
+def _partition_kneighbors(X, ind, n_neighbors, norm_order, **kwargs):
+    """Find k nearest neighbors of the samples in a cell among all the
+    samples.
+
+    The k-distances within the cell bound the radius in which the true
+    neighbors lie, so only the supporting samples outside the cell that are
+    within this radius from its bounding box are searched.
+    """
+
+    X_cell            = X[ind]
+    n_cell,           = ind.shape
+
+    if n_cell > n_neighbors:
+        neigh_dist, _ = NearestNeighbors(
+            n_neighbors=n_neighbors, **kwargs
+        ).fit(X_cell).kneighbors()
+        radius        = np.max(neigh_dist[:, -1])
+    else:
+        radius        = np.inf
+
+    n_samples, _      = X.shape
+    is_support        = np.zeros(n_samples, dtype=bool)
+    lower             = np.min(X_cell, axis=0)
+    upper             = np.max(X_cell, axis=0)
+    chunk_n_rows      = get_chunk_n_rows(
+        row_bytes     = 2 * X.nbytes // n_samples,
+        max_n_rows    = n_samples
+    )
+
+    for s in gen_batches(n_samples, chunk_n_rows):
+        gap           = np.maximum(lower - X[s], 0.) \
+            + np.maximum(X[s] - upper, 0.)
+        is_support[s] = np.linalg.norm(gap, ord=norm_order, axis=1) <= radius
+
+    is_support[ind]   = False
+    candidate         = np.concatenate([ind, np.flatnonzero(is_support)])
+
+    # the samples in the cell are their own nearest neighbors and come
+    # first among the candidates
+    neigh_dist, neigh_ind = NearestNeighbors(
+        n_neighbors=n_neighbors + 1, **kwargs
+    ).fit(X[candidate]).kneighbors(X_cell)
+    is_self           = neigh_ind == np.arange(n_cell)[:, np.newaxis]
+    has_self          = np.any(is_self, axis=1)
+    is_self[~has_self, -1] = True
+    shape             = (n_cell, n_neighbors)
+
+    return (
+        neigh_dist[~is_self].reshape(shape),
+        candidate[neigh_ind[~is_self].reshape(shape)]
+    )
+
+
+class LOF(NeighborsBufferMixin, BaseOutlierDetector):
     """Local Outlier Factor.
 
     Parameters
@@ -36,6 +125,13 @@ class LOF(BaseOutlierDetector):
     n_neighbors : int, default 20
         Number of neighbors.
 
+    n_partitions : int, default 1
+        Number of cells into which the space is split to find k nearest
+        neighbors of the training data in parallel processes. Each cell is
+        searched together with the samples outside it that can be among the
+        neighbors of its samples, so the result is exact. Only Minkowski
+        metrics are supported if greater than 1.
+
     p : int, default 2
         Power parameter for the Minkowski metric.
 
@@ -87,20 +183,12 @@ class LOF(BaseOutlierDetector):
 
     @property
     def negative_outlier_factor_(self):
-        return self.estimator_.negative_outlier_factor_
-
-    @property
-    def n_neighbors_(self):
-        return self.estimator_.n_neighbors_
-
-    @property
-    def X_(self):
-        return self.estimator_._fit_X
+        return -self._outlier_factor[:self._n_reference]
 
     def __init__(
         self, algorithm='auto', contamination=0.1, leaf_size=30,
         metric='minkowski', novelty=False, n_jobs=1, n_neighbors=20,
-        p=2, metric_params=None
+        n_partitions=1, p=2, metric_params=None
     ):
         self.algorithm     = algorithm
         self.contamination = contamination
@@ -109,45 +197,599 @@ class LOF(BaseOutlierDetector):
         self.novelty       = novelty
         self.n_jobs        = n_jobs
         self.n_neighbors   = n_neighbors
+        self.n_partitions  = n_partitions
         self.p             = p
         self.metric_params = metric_params
 
+    def _check_params(self):
+        super()._check_params()
+
+        if self.n_partitions <= 0:
+            raise ValueError(
+                f'n_partitions must be positive but was {self.n_partitions}'
+            )
+
+        if self.n_partitions > 1 and self.metric not in MINKOWSKI_P:
+            raise ValueError(
+                f'metric must be a Minkowski metric if n_partitions is '
+                f'greater than 1 but was {self.metric}'
+            )
+
     def _check_is_fitted(self):
         super()._check_is_fitted()
 
+        # X_ is not checked since it concatenates the tree and the buffer
         check_is_fitted(
-            self, ['negative_outlier_factor_', 'n_neighbors_', 'X_']
+            self, [
+                '_outlier_factor', 'n_neighbors_',
+                'estimator_', '_X_buffer'
+            ]
         )
 
     def _get_threshold(self):
-        return - self.estimator_.threshold_ - 1.
+        return np.percentile(
+            self._outlier_factor[:self._n_reference],
+            100. * (1. - self.contamination)
+        ) - 1.
 
     def _fit(self, X):
-        self.estimator_   = LocalOutlierFactor(
-            algorithm     = self.algorithm,
-            contamination = self.contamination,
-            leaf_size     = self.leaf_size,
-            metric        = self.metric,
-            n_jobs        = self.n_jobs,
-            n_neighbors   = self.n_neighbors,
-            p             = self.p,
-            metric_params = self.metric_params
+        n_samples, _          = X.shape
+        self.n_neighbors_     = np.maximum(
+            1, np.minimum(self.n_neighbors, n_samples - 1)
+        )
+        self.estimator_       = NearestNeighbors(
+            algorithm         = self.algorithm,
+            leaf_size         = self.leaf_size,
+            metric            = self.metric,
+            n_jobs            = self.n_jobs,
+            n_neighbors       = self.n_neighbors_,
+            p                 = self.p,
+            metric_params     = self.metric_params
         ).fit(X)
 
+        self._init_buffer(X)
+
+        # float32 data is scored in float32
+        dtype                 = np.result_type(X.dtype, np.float32)
+
+        if self.n_partitions == 1:
+            neigh_dist, neigh_ind = self.estimator_.kneighbors()
+        else:
+            neigh_dist, neigh_ind = self._partition_kneighbors(X)
+
+        self._neigh_dist      = neigh_dist.astype(dtype, copy=False)
+        self._neigh_ind       = neigh_ind
+        self._kdist           = self._neigh_dist[:, -1].copy()
+        self._lrd             = self._local_reachability_density(
+            self._neigh_dist, self._neigh_ind
+        )
+        self._outlier_factor  = np.mean(
+            self._lrd[self._neigh_ind], axis=1
+        ) / self._lrd
+
+        self._index_k_distances()
+
+        # reuse the LOF for each training sample to avoid a second query
+        self._train_anomaly_score = self._regularize(self._outlier_factor)
+
         return self
 
+    def _partition_kneighbors(self, X):
+        """Find k nearest neighbors of the training data cell by cell in
+        parallel processes."""
+
+        n_samples, _ = X.shape
+        cells        = _partition(X, np.minimum(self.n_partitions, n_samples))
+        norm_order   = MINKOWSKI_P[self.metric]
+
+        if norm_order is None:
+            norm_order = self._metric_params['p']
+
+        result       = Parallel(n_jobs=self.n_jobs)(
+            delayed(_partition_kneighbors)(
+                X, ind, self.n_neighbors_, norm_order,
+                algorithm     = self.algorithm,
+                leaf_size     = self.leaf_size,
+                metric        = self.metric,
+                p             = self.p,
+                metric_params = self.metric_params
+            ) for ind in cells
+        )
+        neigh_dist   = np.empty((n_samples, self.n_neighbors_))
+        neigh_ind    = np.empty((n_samples, self.n_neighbors_), dtype=np.intp)
+
+        for ind, (dist, neigh) in zip(cells, result):
+            neigh_dist[ind] = dist
+            neigh_ind[ind]  = neigh
+
+        return neigh_dist, neigh_ind
+
     def _anomaly_score(self, X, regularize=True):
         lof = self._lof(X)
 
         if regularize:
-            return np.maximum(0., lof - 1.)
+            return self._regularize(lof)
         else:
             return lof
 
+    def _regularize(self, lof):
+        """Regularize the LOF so that higher values indicate outliers."""
+
+        return np.maximum(0., lof - 1.)
+
     def _lof(self, X):
         """Compute the Local Outlier Factor (LOF) for each sample."""
 
-        if X is self.X_:
-            return -self.negative_outlier_factor_
+        if self._n_buffer == 0 and X is self.estimator_._fit_X:
+            return self._outlier_factor[:self._n_reference]
+
+        n_samples, _              = X.shape
+        lof                       = np.empty(n_samples, dtype=self._lrd.dtype)
+
+        # bound the temporary arrays of the k nearest neighbors
+        chunk_n_rows              = get_chunk_n_rows(
+            row_bytes             = 24 * (self.n_neighbors_ + self._n_buffer),
+            max_n_rows            = n_samples
+        )
+
+        for s in gen_batches(n_samples, chunk_n_rows):
+            neigh_dist, neigh_ind = self._kneighbors(X[s])
+            lrd                   = self._local_reachability_density(
+                neigh_dist, neigh_ind
+            )
+            lof[s]                = np.mean(
+                self._lrd[neigh_ind], axis=1
+            ) / lrd
+
+        return lof
+
+    def _local_reachability_density(self, neigh_dist, neigh_ind):
+        """Compute the local reachability density from the k nearest
+        neighbors of each sample."""
+
+        reach_dist = np.maximum(neigh_dist, self._kdist[neigh_ind])
+
+        return 1. / (np.mean(reach_dist, axis=1) + 1e-10)
+
+    def _index_k_distances(self):
+        """Split the samples in the tree into those within the radius
+        queried for candidates and the few with the largest k-distances,
+        which are scanned instead. Since k-distances only decrease as
+        samples are added, the split stays valid until the tree is rebuilt.
+        """
+
+        n_tree, _            = self.estimator_._fit_X.shape
+        kdist                = self._kdist[:n_tree]
+        self._radius         = np.percentile(
+            kdist, 100. * (1. - MAX_FAR_RATIO)
+        )
+        self._far            = np.flatnonzero(kdist > self._radius)
+
+    def _candidates(self, X):
+        """Find the reference samples that can have any of the given samples
+        among their k nearest neighbors, that is, the samples in the tree
+        within the radius from them, the samples in the tree with larger
+        k-distances than the radius and all the samples in the buffer."""
+
+        n_tree, _            = self.estimator_._fit_X.shape
+
+        # widen the radius so that the neighbors at exactly the k-distance
+        # are not lost to rounding errors
+        ind                  = self.estimator_.radius_neighbors(
+            X, radius=self._radius * (1. + RADIUS_RTOL),
+            return_distance=False
+        )
+
+        return np.concatenate([
+            np.unique(np.concatenate([self._far, *ind])).astype(np.intp),
+            np.arange(n_tree, self._n_reference)
+        ])
+
+    def _reverse_neighbors(self, ind):
+        """Find the reference samples that have any of the reference samples
+        with the given indices among their k nearest neighbors."""
+
+        if ind.size == 0:
+            return ind
+
+        candidate            = self._candidates(self._reference_rows(ind))
+        is_reverse           = np.any(
+            np.isin(self._neigh_ind[candidate], ind), axis=1
+        )
+
+        return candidate[is_reverse]
+
+    def _kneighbors(self, X, X_batch=None):
+        """Find k nearest neighbors in the tree and the buffer. If the batch
+        is given, also search in the batch, which is expected to be X itself
+        and to be indexed after the buffer."""
+
+        n_tree, _            = self.estimator_._fit_X.shape
+        n_buffer             = self._n_buffer
+        n_samples, _         = X.shape
+        dist, ind            = self.estimator_.kneighbors(
+            X, n_neighbors=self.n_neighbors_
+        )
+        candidate_dist       = [dist]
+        candidate_ind        = [ind]
+
+        if n_buffer > 0:
+            candidate_dist.append(
+                self._pairwise_distances(X, self._X_buffered)
+            )
+            candidate_ind.append(
+                np.broadcast_to(
+                    n_tree + np.arange(n_buffer), (n_samples, n_buffer)
+                )
+            )
+
+        if X_batch is not None:
+            dist             = self._pairwise_distances(X, X_batch)
+
+            np.fill_diagonal(dist, np.inf)
+
+            candidate_dist.append(dist)
+            candidate_ind.append(
+                np.broadcast_to(
+                    n_tree + n_buffer + np.arange(n_samples),
+                    (n_samples, n_samples)
+                )
+            )
+
+        if len(candidate_dist) > 1:
+            dist             = np.concatenate(candidate_dist, axis=1)
+            ind              = np.concatenate(candidate_ind, axis=1)
+            order            = np.argsort(dist, axis=1)[:, :self.n_neighbors_]
+            rows             = np.arange(n_samples)[:, np.newaxis]
+            dist             = dist[rows, order]
+            ind              = ind[rows, order]
+
+        return dist.astype(self._kdist.dtype, copy=False), ind
+
+    def _update_neighbors(self, X_batch):
+        """Update k nearest neighbors of the reference samples with the
+        samples in the batch, which are indexed after them, and return the
+        indices of the updated samples."""
+
+        n_reference          = self._n_reference
+        n_batch, _           = X_batch.shape
+        candidate            = self._candidates(X_batch)
+        n_candidates,        = candidate.shape
+        is_updated           = np.zeros(n_candidates, dtype=bool)
+        chunk_n_rows         = get_chunk_n_rows(
+            row_bytes        = 16 * (n_batch + self.n_neighbors_),
+            max_n_rows       = n_candidates
+        )
+
+        for s in gen_batches(n_candidates, chunk_n_rows):
+            ind              = candidate[s]
+            neigh_dist       = self._neigh_dist[ind]
+            neigh_ind        = self._neigh_ind[ind]
+            dist             = self._pairwise_distances(
+                self._reference_rows(ind), X_batch
+            )
+            is_closer        = np.min(dist, axis=1) < neigh_dist[:, -1]
+            n_closer         = np.sum(is_closer)
+
+            if n_closer == 0:
+                continue
+
+            dist             = np.concatenate(
+                [neigh_dist[is_closer], dist[is_closer]], axis=1
+            )
+            ind              = np.concatenate([
+                neigh_ind[is_closer],
+                np.broadcast_to(
+                    n_reference + np.arange(n_batch), (n_closer, n_batch)
+                )
+            ], axis=1)
+            order            = np.argsort(dist, axis=1)[:, :self.n_neighbors_]
+            rows             = np.arange(n_closer)[:, np.newaxis]
+            updated          = candidate[s][is_closer]
+            self._neigh_dist[updated] = dist[rows, order]
+            self._neigh_ind[updated]  = ind[rows, order]
+            is_updated[s]    = is_closer
+
+        return candidate[is_updated]
+
+    def add_samples(self, X):
+        """Add samples to the reference data and incrementally update the
+        LOF of the affected samples.
+
+        Only the samples whose k nearest neighbors change, the samples whose
+        neighbors have changed k-distances and the samples whose neighbors
+        have changed local reachability densities are updated. They are
+        found among the samples in the tree within the 95th percentile of
+        the k-distances from the changed samples, the samples in the tree
+        with larger k-distances and the samples in the buffer. New samples
+        are kept in a buffer searched by brute force, which is merged into
+        the tree once it exceeds 10% of the samples in the tree.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features)
+            Samples to be added.
+
+        Returns
+        -------
+        self : object
+            Return self.
+
+        References
+        ----------
+        .. [#pokrajac07] Pokrajac, D., Lazarevic, A., and Latecki, L. J.,
+            "Incremental local outlier detection for data streams,"
+            In Proceedings of CIDM, pp. 504-515, 2007.
+        """
+
+        self._check_is_fitted()
+
+        X                    = self._check_array(X, estimator=self)
+        n_samples, _         = X.shape
+        n_reference          = self._n_reference
+        n_total              = n_reference + n_samples
+        neigh_dist, neigh_ind = self._kneighbors(X, X_batch=X)
+
+        # samples whose k nearest neighbors change
+        changed              = np.concatenate([
+            self._update_neighbors(X), np.arange(n_reference, n_total)
+        ])
+
+        self._append_to_buffer(X)
+
+        self._neigh_dist     = reserve_rows(self._neigh_dist, n_total)
+        self._neigh_ind      = reserve_rows(self._neigh_ind, n_total)
+        self._kdist          = reserve_rows(self._kdist, n_total)
+        self._lrd            = reserve_rows(self._lrd, n_total)
+        self._outlier_factor = reserve_rows(self._outlier_factor, n_total)
+        self._neigh_dist[n_reference:n_total] = neigh_dist
+        self._neigh_ind[n_reference:n_total]  = neigh_ind
+        self._kdist[changed] = self._neigh_dist[changed, -1]
+
+        # samples whose reachability distances change
+        changed_lrd          = np.union1d(
+            changed, self._reverse_neighbors(changed)
+        )
+        self._lrd[changed_lrd] = self._local_reachability_density(
+            self._neigh_dist[changed_lrd], self._neigh_ind[changed_lrd]
+        )
+
+        # samples whose neighbors have changed densities, where the reverse
+        # neighbors of the samples whose neighbors change are already known
+        changed              = np.union1d(
+            changed_lrd, self._reverse_neighbors(
+                np.setdiff1d(changed_lrd, changed)
+            )
+        )
+        self._outlier_factor[changed] = np.mean(
+            self._lrd[self._neigh_ind[changed]], axis=1
+        ) / self._lrd[changed]
+
+        if self._merge_buffer():
+            self._index_k_distances()
+
+        self.anomaly_score_  = self._regularize(
+            self._outlier_factor[:n_total]
+        )
+        self.threshold_      = self._get_threshold()
+        self.contamination_  = self._get_contamination()
+        self.random_variable_ = self._get_random_variable()
+
+        return self
+
+
+class MultiLOF(BaseOutlierDetector):
+    """Local Outlier Factor aggregated over a range of numbers of neighbors.
+
+    k nearest neighbors are queried once for the largest number of neighbors,
+    and the LOF for each smaller number of neighbors is derived from them.
+
+    Parameters
+    ----------
+    algorithm : str, default 'auto'
+        Tree algorithm to use. Valid algorithms are
+        ['kd_tree'|'ball_tree'|'auto'].
+
+    combination : str, default 'max'
+        Method to aggregate the LOFs. Valid methods are ['max'|'mean'].
+
+    contamination : float, default 0.1
+        Proportion of outliers in the data set. Used to define the threshold.
+
+    leaf_size : int, default 30
+        Leaf size of the underlying tree.
+
+    max_neighbors : int, default 30
+        Largest number of neighbors.
+
+    metric : str or callable, default 'minkowski'
+        Distance metric to use.
+
+    min_neighbors : int, default 10
+        Smallest number of neighbors.
+
+    novelty : bool, default False
+        If True, you can use predict, decision_function and anomaly_score on
+        new unseen data and not on the training data.
+
+    n_jobs : int, default 1
+        Number of jobs to run in parallel. If -1, then the number of jobs is
+        set to the number of CPU cores.
+
+    p : int, default 2
+        Power parameter for the Minkowski metric.
+
+    metric_params : dict, default None
+        Additioal parameters passed to the requested metric.
+
+    Attributes
+    ----------
+    anomaly_score_ : array-like of shape (n_samples,)
+        Anomaly score for each training data.
+
+    contamination_ : float
+        Actual proportion of outliers in the data set.
+
+    threshold_ : float
+        Threshold.
+
+    max_neighbors_ : int
+        Actual largest number of neighbors.
+
+    min_neighbors_ : int
+        Actual smallest number of neighbors.
+
+    X_ : array-like of shape (n_samples, n_features)
+        Training data.
+
+    References
+    ----------
+    .. [#breunig00] Breunig, M. M., Kriegel, H.-P., Ng, R. T., and Sander, J.,
+        "LOF: identifying density-based local outliers,"
+        In Proceedings of SIGMOD, pp. 93-104, 2000.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from kenchi.outlier_detection import MultiLOF
+    >>> X = np.array([
+    ...     [0., 0.], [1., 1.], [2., 0.], [3., -1.], [4., 0.],
+    ...     [5., 1.], [6., 0.], [7., -1.], [8., 0.], [1000., 1.]
+    ... ])
+    >>> det = MultiLOF(max_neighbors=5, min_neighbors=3)
+    >>> det.fit_predict(X)
+    array([ 1,  1,  1,  1,  1,  1,  1,  1,  1, -1])
+    """
+
+    @property
+    def X_(self):
+        return self.estimator_._fit_X
+
+    def __init__(
+        self, algorithm='auto', combination='max', contamination=0.1,
+        leaf_size=30, max_neighbors=30, metric='minkowski', min_neighbors=10,
+        novelty=False, n_jobs=1, p=2, metric_params=None
+    ):
+        self.algorithm     = algorithm
+        self.combination   = combination
+        self.contamination = contamination
+        self.leaf_size     = leaf_size
+        self.max_neighbors = max_neighbors
+        self.metric        = metric
+        self.min_neighbors = min_neighbors
+        self.novelty       = novelty
+        self.n_jobs        = n_jobs
+        self.p             = p
+        self.metric_params = metric_params
+
+    def _check_params(self):
+        super()._check_params()
+
+        if self.combination not in ['max', 'mean']:
+            raise ValueError(
+                f'combination must be one of max or mean '
+                f'but was {self.combination}'
+            )
+
+        if self.min_neighbors <= 0:
+            raise ValueError(
+                f'min_neighbors must be positive but was {self.min_neighbors}'
+            )
+
+        if self.max_neighbors < self.min_neighbors:
+            raise ValueError(
+                f'max_neighbors must be greater than or equal to '
+                f'min_neighbors but was {self.max_neighbors}'
+            )
+
+    def _check_is_fitted(self):
+        super()._check_is_fitted()
+
+        check_is_fitted(self, ['max_neighbors_', 'min_neighbors_', 'X_'])
+
+    def _fit(self, X):
+        n_samples, _        = X.shape
+        self.max_neighbors_ = np.minimum(self.max_neighbors, n_samples - 1)
+        self.min_neighbors_ = np.minimum(
+            self.min_neighbors, self.max_neighbors_
+        )
+        self.estimator_     = NearestNeighbors(
+            algorithm       = self.algorithm,
+            leaf_size       = self.leaf_size,
+            metric          = self.metric,
+            n_jobs          = self.n_jobs,
+            n_neighbors     = self.max_neighbors_,
+            p               = self.p,
+            metric_params   = self.metric_params
+        ).fit(X)
+
+        neigh_dist, neigh_ind = self.estimator_.kneighbors()
+        n_neighbors_range   = range(
+            self.min_neighbors_, self.max_neighbors_ + 1
+        )
+
+        # k-distance and local reachability density for each k
+        self._kdist         = neigh_dist[:, self.min_neighbors_ - 1:]
+        self._lrd           = np.stack([
+            self._local_reachability_density(neigh_dist, neigh_ind, i)
+            for i, _ in enumerate(n_neighbors_range)
+        ], axis=1)
+        lof                 = np.stack([
+            self._lof(neigh_ind, self._lrd[:, i], i)
+            for i, _ in enumerate(n_neighbors_range)
+        ], axis=1)
+
+        # reuse the LOFs for each training sample to avoid a second query
+        self._train_anomaly_score = self._regularize(self._combine(lof))
+
+        return self
+
+    def _anomaly_score(self, X, regularize=True):
+        neigh_dist, neigh_ind = self.estimator_.kneighbors(X)
+        n_samples, _          = X.shape
+        lof                   = np.empty((n_samples, self._lrd.shape[1]))
+
+        for i in range(self._lrd.shape[1]):
+            lrd               = self._local_reachability_density(
+                neigh_dist, neigh_ind, i
+            )
+            lof[:, i]         = self._lof(neigh_ind, lrd, i)
+
+        lof                   = self._combine(lof)
+
+        if regularize:
+            return self._regularize(lof)
         else:
-            return -self.estimator_._decision_function(X)
+            return lof
+
+    def _local_reachability_density(self, neigh_dist, neigh_ind, i):
+        """Compute the local reachability density with the i-th number of
+        neighbors in the range."""
+
+        n_neighbors = self.min_neighbors_ + i
+        reach_dist  = np.maximum(
+            neigh_dist[:, :n_neighbors],
+            self._kdist[neigh_ind[:, :n_neighbors], i]
+        )
+
+        return 1. / (np.mean(reach_dist, axis=1) + 1e-10)
+
+    def _lof(self, neigh_ind, lrd, i):
+        """Compute the LOF with the i-th number of neighbors in the range."""
+
+        n_neighbors = self.min_neighbors_ + i
+
+        return np.mean(self._lrd[neigh_ind[:, :n_neighbors], i], axis=1) / lrd
+
+    def _combine(self, lof):
+        """Aggregate the LOFs over the range of numbers of neighbors."""
+
+        if self.combination == 'max':
+            return np.max(lof, axis=1)
+        else:
+            return np.mean(lof, axis=1)
+
+    def _regularize(self, lof):
+        """Regularize the LOF so that higher values indicate outliers."""
+
+        return np.maximum(0., lof - 1.)
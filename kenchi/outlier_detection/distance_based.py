@@ -1,14 +1,63 @@
 import numpy as np
-from sklearn.neighbors import DistanceMetric, NearestNeighbors
-from sklearn.utils import check_random_state
+from sklearn.externals.joblib import delayed, Parallel
+from sklearn.neighbors import (
+    BallTree, DistanceMetric, KDTree, NearestNeighbors
+)
+from sklearn.utils import check_random_state, gen_batches
 from sklearn.utils.validation import check_is_fitted
 
-from .base import BaseOutlierDetector
+from .base import BaseOutlierDetector, NeighborsBufferMixin
+from ..utils import (
+    compute_coreset, fast_pairwise_distances, get_chunk_n_rows, reserve_rows,
+    FAST_METRICS
+)
 
 __all__ = ['KNN', 'OneTimeSampling']
 
+MAX_N_FEATURES_TREE   = 15
+MIN_N_SUBSAMPLES_TREE = 1000
 
-class KNN(BaseOutlierDetector):
+
+def _mean_min_distance(
+    X, S, estimators_subsamples, metric='euclidean', dist_metric=None,
+    S_norm_squared=None
+):
+    """Compute the distance from each sample to its nearest subsample and
+    average it over estimators."""
+
+    # take the square root after the min-reduction
+    squared      = dist_metric is None and FAST_METRICS[metric] == 'euclidean'
+
+    if dist_metric is None:
+        dist     = fast_pairwise_distances(
+            X, S, metric=metric, squared=squared,
+            Y_norm_squared=S_norm_squared
+        )
+    else:
+        dist     = dist_metric.pairwise(X, S)
+
+    n_estimators, _ = estimators_subsamples.shape
+
+    if n_estimators == 1:
+        # a single subsample is the union of subsamples itself
+        min_dist = np.min(dist, axis=1, keepdims=True)
+    else:
+        min_dist = np.min(dist[:, estimators_subsamples], axis=2)
+
+    if squared:
+        np.sqrt(min_dist, out=min_dist)
+
+    return np.mean(min_dist, axis=1)
+
+
+def _mean_nearest_distance(X, trees):
+    """Query the distance from each sample to its nearest subsample with each
+    tree and average it over trees."""
+
+    return np.mean([tree.query(X, k=1)[0][:, 0] for tree in trees], axis=0)
+
+
+class KNN(NeighborsBufferMixin, BaseOutlierDetector):
     """Outlier detector using k-nearest neighbors algorithm.
 
     Parameters
@@ -24,6 +73,12 @@ class KNN(BaseOutlierDetector):
     contamination : float, default 0.1
         Proportion of outliers in the data set. Used to define the threshold.
 
+    coreset_size : int, default None
+        Maximum number of prototypes that replace the training data. If None,
+        the whole training data is kept. Otherwise, each sample is represented
+        by its nearest prototype found by greedy k-center clustering and
+        neighbors are counted according to the weights of the prototypes.
+
     leaf_size : int, default 30
         Leaf size of the underlying tree.
 
@@ -58,11 +113,16 @@ class KNN(BaseOutlierDetector):
     threshold_ : float
         Threshold.
 
+    coreset_weights_ : array-like of shape (n_prototypes,)
+        Number of training samples represented by each prototype. None if
+        ``coreset_size`` is None.
+
     n_neighbors_ : int
         Actual number of neighbors used for ``kneighbors`` queries.
 
     X_ : array-like of shape (n_samples, n_features)
-        Training data.
+        Training data, or prototypes if ``coreset_size`` is not None. Samples
+        added by ``add_samples`` are appended.
 
     References
     ----------
@@ -70,6 +130,10 @@ class KNN(BaseOutlierDetector):
         "Fast outlier detection in high dimensional spaces,"
         In Proceedings of PKDD, pp. 15-27, 2002.
 
+    .. [#gonzalez85] Gonzalez, T. F.,
+        "Clustering to minimize the maximum intercluster distance,"
+        Theoretical Computer Science, 38, pp. 293-306, 1985.
+
     .. [#ramaswamy00] Ramaswamy, S., Rastogi, R., and Shim, K.,
         "Efficient algorithms for mining outliers from large data sets,"
         In Proceedings of SIGMOD, pp. 427-438, 2000.
@@ -87,18 +151,15 @@ class KNN(BaseOutlierDetector):
     array([ 1,  1,  1,  1,  1,  1,  1,  1,  1, -1])
     """
 
-    @property
-    def X_(self):
-        return self.estimator_._fit_X
-
     def __init__(
         self, aggregate=False, algorithm='auto', contamination=0.1,
-        leaf_size=30, metric='minkowski', novelty=False, n_jobs=1,
-        n_neighbors=20, p=2, metric_params=None
+        coreset_size=None, leaf_size=30, metric='minkowski', novelty=False,
+        n_jobs=1, n_neighbors=20, p=2, metric_params=None
     ):
         self.aggregate     = aggregate
         self.algorithm     = algorithm
         self.contamination = contamination
+        self.coreset_size  = coreset_size
         self.leaf_size     = leaf_size
         self.metric        = metric
         self.novelty       = novelty
@@ -110,13 +171,38 @@ class KNN(BaseOutlierDetector):
     def _check_is_fitted(self):
         super()._check_is_fitted()
 
-        check_is_fitted(self, ['n_neighbors_', 'X_'])
+        # X_ is not checked since it concatenates the tree and the buffer
+        check_is_fitted(
+            self, [
+                'coreset_weights_', 'n_neighbors_',
+                'estimator_', '_X_buffer'
+            ]
+        )
+
+    def _check_params(self):
+        super()._check_params()
+
+        if self.coreset_size is not None and self.coreset_size <= 0:
+            raise ValueError(
+                f'coreset_size must be positive but was {self.coreset_size}'
+            )
 
     def _fit(self, X):
         n_samples, _      = X.shape
         self.n_neighbors_ = np.maximum(
             1, np.minimum(self.n_neighbors, n_samples - 1)
         )
+
+        if self.coreset_size is None:
+            self.coreset_weights_ = None
+            X_prototype           = X
+        else:
+            coreset, self.coreset_weights_, labels = compute_coreset(
+                X, self.coreset_size, metric=self.metric,
+                **self._metric_params
+            )
+            X_prototype           = X[coreset]
+
         self.estimator_   = NearestNeighbors(
             algorithm     = self.algorithm,
             leaf_size     = self.leaf_size,
@@ -125,39 +211,209 @@ class KNN(BaseOutlierDetector):
             n_neighbors   = self.n_neighbors_,
             p             = self.p,
             metric_params = self.metric_params
-        ).fit(X)
+        ).fit(X_prototype)
+
+        self._init_buffer(X)
+
+        if self.coreset_weights_ is None:
+            # keep the distances to update them in add_samples
+            self._neigh_dist, _       = self.estimator_.kneighbors()
+            self._train_anomaly_score = self._aggregate(self._neigh_dist)
+        else:
+            self._train_anomaly_score = self._weighted_anomaly_score(
+                X, labels=labels
+            )
 
         return self
 
     def _anomaly_score(self, X):
-        if X is self.X_:
+        if self.coreset_weights_ is not None:
+            return self._weighted_anomaly_score(X)
+
+        if X is self.estimator_._fit_X:
             dist, _ = self.estimator_.kneighbors()
         else:
-            dist, _ = self.estimator_.kneighbors(X)
+            dist    = self._kneighbors_distance(X)
+
+        return self._aggregate(dist)
+
+    def _aggregate(self, dist):
+        """Aggregate the distances from k nearest neighbors."""
 
         if self.aggregate:
             return np.sum(dist, axis=1)
         else:
             return np.max(dist, axis=1)
 
+    def _kneighbors_distance(self, X, X_batch=None):
+        """Find the distances from k nearest neighbors in the tree and the
+        buffer. If the batch is given, also search in the batch, which is
+        expected to be X itself."""
+
+        dist, _   = self.estimator_.kneighbors(X)
+        candidate = [dist]
+
+        if self._n_buffer > 0:
+            candidate.append(self._pairwise_distances(X, self._X_buffered))
+
+        if X_batch is not None:
+            dist  = self._pairwise_distances(X, X_batch)
+
+            np.fill_diagonal(dist, np.inf)
+
+            candidate.append(dist)
+
+        dist      = np.concatenate(candidate, axis=1)
+
+        return np.sort(dist, axis=1)[:, :self.n_neighbors_]
+
+    def _update_neigh_dist(self, X, X_batch, offset=0):
+        """Update the distances from k nearest neighbors of the reference
+        samples X, stored from the given offset, with the samples in the
+        batch."""
+
+        n_samples, _     = X.shape
+        n_batch, _       = X_batch.shape
+        chunk_n_rows     = get_chunk_n_rows(
+            row_bytes    = 8 * (n_batch + self.n_neighbors_),
+            max_n_rows   = n_samples
+        )
+
+        for s in gen_batches(n_samples, chunk_n_rows):
+            neigh_dist   = self._neigh_dist[offset + s.start:offset + s.stop]
+            dist         = self._pairwise_distances(X[s], X_batch)
+            is_updated   = np.min(dist, axis=1) < neigh_dist[:, -1]
+            neigh_dist[is_updated] = np.sort(
+                np.concatenate(
+                    [neigh_dist[is_updated], dist[is_updated]], axis=1
+                ), axis=1
+            )[:, :self.n_neighbors_]
+
+    def add_samples(self, X):
+        """Add samples to the reference data without rebuilding the tree.
+
+        New samples are kept in a buffer searched by brute force, which is
+        merged into the tree once it exceeds 10% of the samples in the tree.
+        The anomaly score of each reference sample is updated only if some of
+        the new samples enter its k nearest neighbors, and the threshold is
+        refreshed accordingly.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features)
+            Samples to be added.
+
+        Returns
+        -------
+        self : object
+            Return self.
+        """
+
+        self._check_is_fitted()
+
+        if self.coreset_weights_ is not None:
+            raise ValueError(
+                'add_samples is not available when coreset_size is not None'
+            )
+
+        X                     = self._check_array(X, estimator=self)
+        n_samples, _          = X.shape
+        n_reference           = self._n_reference
+        n_total               = n_reference + n_samples
+        neigh_dist            = self._kneighbors_distance(X, X_batch=X)
+
+        # the samples in the tree and the buffer are updated before the new
+        # samples are put in the buffer
+        X_tree                = self.estimator_._fit_X
+        n_tree, _             = X_tree.shape
+
+        self._update_neigh_dist(X_tree, X)
+        self._update_neigh_dist(self._X_buffered, X, offset=n_tree)
+        self._append_to_buffer(X)
+
+        self._neigh_dist      = reserve_rows(self._neigh_dist, n_total)
+        self._neigh_dist[n_reference:n_total] = neigh_dist
+
+        self._merge_buffer()
+
+        self.anomaly_score_   = self._aggregate(self._neigh_dist[:n_total])
+        self.threshold_       = self._get_threshold()
+        self.contamination_   = self._get_contamination()
+        self.random_variable_ = self._get_random_variable()
+
+        return self
+
+    def _weighted_anomaly_score(self, X, labels=None):
+        """Compute the anomaly score for each sample against the weighted
+        prototypes. If the labels are given, X is expected to be the training
+        data and each sample is not counted as its own neighbor, that is, is
+        removed from the weight of the prototype it is assigned to."""
+
+        n_prototypes,  = self.coreset_weights_.shape
+        dist, ind      = self.estimator_.kneighbors(
+            X, n_neighbors=np.minimum(self.n_neighbors_ + 1, n_prototypes)
+        )
+        weights        = self.coreset_weights_[ind]
+
+        if labels is not None:
+            weights   -= ind == labels[:, np.newaxis]
+
+        cum_weights    = np.cumsum(weights, axis=1)
+
+        if self.aggregate:
+            n_used     = np.clip(
+                self.n_neighbors_ - cum_weights + weights, 0, weights
+            )
+
+            return np.sum(n_used * dist, axis=1)
+
+        is_reached     = cum_weights >= self.n_neighbors_
+        kth            = np.where(
+            np.any(is_reached, axis=1),
+            np.argmax(is_reached, axis=1),
+            ind.shape[1] - 1
+        )
+
+        return dist[np.arange(kth.size), kth]
+
 
 class OneTimeSampling(BaseOutlierDetector):
     """One-time sampling.
 
     Parameters
     ----------
+    algorithm : str, default 'auto'
+        Algorithm used to find the nearest subsample. Valid algorithms are
+        ['auto'|'brute'|'kd_tree'|'ball_tree']. If 'auto', a tree is built
+        over each subsample when ``n_subsamples`` is at least 1000 and the
+        metric is supported, otherwise brute-force search is performed.
+
     contamination : float, default 0.1
         Proportion of outliers in the data set. Used to define the threshold.
 
+    leaf_size : int, default 30
+        Leaf size of the underlying tree.
+
     metric : str, default 'euclidean'
-        Distance metric to use.
+        Distance metric to use. Brute-force search uses vectorized kernels
+        that preserve float32 data for ['cityblock'|'cosine'|'euclidean'|'l1'|
+        'l2'|'manhattan'].
 
     novelty : bool, default False
         If True, you can use predict, decision_function and anomaly_score on
         new unseen data and not on the training data.
 
+    n_estimators : int, default 1
+        Number of subsamples to draw. The anomaly score is averaged over
+        estimators, while distances are computed only once against the union
+        of subsamples.
+
+    n_jobs : int, default 1
+        Number of jobs to run in parallel. If -1, then the number of jobs is
+        set to the number of CPU cores.
+
     n_subsamples : int, default 20
-        Number of random samples to be used.
+        Number of random samples to be used by each estimator.
 
     random_state : int, RandomState instance, default None
         Seed of the pseudo random number generator.
@@ -176,12 +432,22 @@ class OneTimeSampling(BaseOutlierDetector):
     threshold_ : float
         Threshold.
 
-    subsamples_ : array-like of shape (n_subsamples,)
+    algorithm_ : str
+        Actual algorithm used to find the nearest subsample.
+
+    estimators_subsamples_ : array-like of shape (n_estimators, n_subsamples)
+        Indices of the rows of ``S_`` drawn by each estimator.
+
+    subsamples_ : array-like of shape (n_unique_subsamples,)
         Indices of subsamples.
 
-    S_ : array-like of shape (n_subsamples, n_features)
+    S_ : array-like of shape (n_unique_subsamples, n_features)
         Subset of the given training data.
 
+    trees_ : list
+        Tree built over the subsample of each estimator. None if
+        ``algorithm_`` is 'brute'.
+
     References
     ----------
     .. [#sugiyama13] Sugiyama, M., and Borgwardt, K.,
@@ -209,12 +475,17 @@ class OneTimeSampling(BaseOutlierDetector):
             return self.metric_params
 
     def __init__(
-        self, contamination=0.1, metric='euclidean', novelty=False,
+        self, algorithm='auto', contamination=0.1, leaf_size=30,
+        metric='euclidean', novelty=False, n_estimators=1, n_jobs=1,
         n_subsamples=20, random_state=None, metric_params=None
     ):
+        self.algorithm     = algorithm
         self.contamination = contamination
+        self.leaf_size     = leaf_size
         self.metric        = metric
         self.novelty       = novelty
+        self.n_estimators  = n_estimators
+        self.n_jobs        = n_jobs
         self.n_subsamples  = n_subsamples
         self.random_state  = random_state
         self.metric_params = metric_params
@@ -222,6 +493,14 @@ class OneTimeSampling(BaseOutlierDetector):
     def _check_params(self):
         super()._check_params()
 
+        if self.algorithm not in ['auto', 'brute', 'kd_tree', 'ball_tree']:
+            raise ValueError(f'invalid algorithm: {self.algorithm}')
+
+        if self.n_estimators <= 0:
+            raise ValueError(
+                f'n_estimators must be positive but was {self.n_estimators}'
+            )
+
         if self.n_subsamples <= 0:
             raise ValueError(
                 f'n_subsamples must be positive but was {self.n_subsamples}'
@@ -242,25 +521,94 @@ class OneTimeSampling(BaseOutlierDetector):
     def _check_is_fitted(self):
         super()._check_is_fitted()
 
-        check_is_fitted(self, ['subsamples_', 'S_'])
+        check_is_fitted(
+            self, ['estimators_subsamples_', 'subsamples_', 'S_', 'trees_']
+        )
 
-    def _fit(self, X):
-        n_samples, _     = X.shape
-        rnd              = check_random_state(self.random_state)
+    def _get_algorithm(self, n_features):
+        """Get the algorithm used to find the nearest subsample."""
 
-        subsamples       = rnd.choice(
-            n_samples, size=self.n_subsamples, replace=False
-        )
+        if self.algorithm != 'auto':
+            return self.algorithm
+
+        # trees are no faster than brute-force search in high dimensions
+        if self.n_subsamples >= MIN_N_SUBSAMPLES_TREE \
+                and n_features <= MAX_N_FEATURES_TREE:
+            if self.metric in KDTree.valid_metrics:
+                return 'kd_tree'
+
+            if self.metric in BallTree.valid_metrics:
+                return 'ball_tree'
+
+        return 'brute'
 
-        # sort again as choice does not guarantee sorted order
-        self.subsamples_ = np.sort(subsamples)
-        self.S_          = X[self.subsamples_]
+    def _fit(self, X):
+        n_samples, n_features = X.shape
+        rnd                   = check_random_state(self.random_state)
+
+        subsamples            = np.array([
+            rnd.choice(n_samples, size=self.n_subsamples, replace=False)
+            for _ in range(self.n_estimators)
+        ])
 
-        self.metric_     = DistanceMetric.get_metric(
-            self.metric, **self._metric_params
+        # np.unique returns the union of subsamples in sorted order
+        self.subsamples_, estimators_subsamples = np.unique(
+            subsamples, return_inverse=True
         )
+        self.estimators_subsamples_ = estimators_subsamples.reshape(
+            subsamples.shape
+        )
+        self.S_               = X[self.subsamples_]
+        self.algorithm_       = self._get_algorithm(n_features)
+
+        if self.algorithm_ == 'brute':
+            self.trees_       = None
+        else:
+            Tree              = \
+                KDTree if self.algorithm_ == 'kd_tree' else BallTree
+            self.trees_       = [
+                Tree(
+                    self.S_[subsamples], leaf_size=self.leaf_size,
+                    metric=self.metric, **self._metric_params
+                ) for subsamples in self.estimators_subsamples_
+            ]
+
+        if self.metric in FAST_METRICS:
+            self.metric_         = None
+            self._S_norm_squared = np.einsum('ij,ij->i', self.S_, self.S_)
+        else:
+            self.metric_         = DistanceMetric.get_metric(
+                self.metric, **self._metric_params
+            )
+            self._S_norm_squared = None
 
         return self
 
     def _anomaly_score(self, X):
-        return np.min(self.metric_.pairwise(X, self.S_), axis=1)
+        n_samples, n_features = X.shape
+        n_unique,             = self.subsamples_.shape
+        n_columns             = n_unique \
+            + self.n_estimators * self.n_subsamples
+
+        if self.metric_ is None and FAST_METRICS[self.metric] == 'manhattan':
+            n_columns        += n_unique * n_features
+
+        chunk_n_rows          = get_chunk_n_rows(
+            row_bytes         = X.dtype.itemsize * n_columns,
+            max_n_rows        = n_samples
+        )
+
+        if self.trees_ is None:
+            func              = _mean_min_distance
+            args              = (
+                self.S_, self.estimators_subsamples_, self.metric,
+                self.metric_, self._S_norm_squared
+            )
+        else:
+            func              = _mean_nearest_distance
+            args              = (self.trees_, )
+
+        return np.concatenate(Parallel(n_jobs=self.n_jobs)(
+            delayed(func)(X[s], *args)
+            for s in gen_batches(n_samples, chunk_n_rows)
+        ))
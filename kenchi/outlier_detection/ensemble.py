@@ -1,9 +1,223 @@
+import copy
+
+import numpy as np
+from scipy.stats import norm
 from sklearn.ensemble import IsolationForest
+from sklearn.exceptions import NotFittedError
+from sklearn.externals.joblib import delayed, dump, Parallel
+from sklearn.utils import check_random_state, gen_batches
 from sklearn.utils.validation import check_is_fitted
 
-from .base import BaseOutlierDetector
+from .base import BaseOutlierDetector, NEG_LABEL, POS_LABEL
+from ..utils import get_chunk_n_rows
+
+__all__                = ['FlatIForest', 'IForest']
+
+N_ESTIMATORS_PER_STEP  = 10
+EARLY_STOPPING_ALPHA   = 0.0027
+
+
+def _average_path_length(n_samples):
+    """Compute the average path length of unsuccessful searches in a binary
+    search tree with the given number of samples."""
+
+    n_samples           = np.asarray(n_samples, dtype=np.float64)
+    average_path_length = np.zeros_like(n_samples)
+    is_large            = n_samples > 2.
+    n_large             = n_samples[is_large]
+
+    average_path_length[n_samples == 2.] = 1.
+    average_path_length[is_large]        = \
+        2. * (np.log(n_large - 1.) + np.euler_gamma) \
+        - 2. * (n_large - 1.) / n_large
+
+    return average_path_length
+
+
+def _build_trees(X, subsamples, max_depth, random_state):
+    """Grow isolation trees on the given subsamples level by level, all
+    trees at once.
+
+    Nodes of each tree are numbered in the order of creation, and the right
+    child of each split node follows its left child. A node that is not split
+    has the feature -1 and holds its depth plus the average path length of
+    the samples that reach it. Nodes are stored in narrow dtypes, and samples
+    are routed with the float32 thresholds, so that trees are scored exactly
+    as they were grown. Trees are returned back to back, along with the
+    offset of the first node of each tree and the total number of nodes.
+    """
+
+    n_estimators, n_subsamples = subsamples.shape
+    _, n_features       = X.shape
+    max_n_nodes         = 2 * n_subsamples - 1
+
+    if n_features <= np.iinfo(np.int16).max:
+        feature_dtype   = np.int16
+    else:
+        feature_dtype   = np.int32
+
+    if max_n_nodes <= np.iinfo(np.int16).max:
+        children_dtype  = np.int16
+    else:
+        children_dtype  = np.int32
+
+    feature             = np.full(
+        (n_estimators, max_n_nodes), -1, dtype=feature_dtype
+    )
+    threshold           = np.zeros(
+        (n_estimators, max_n_nodes), dtype=np.float32
+    )
+    children            = np.zeros(
+        (n_estimators, max_n_nodes), dtype=children_dtype
+    )
+    value               = np.zeros(
+        (n_estimators, max_n_nodes), dtype=np.float32
+    )
+    n_nodes             = np.ones(n_estimators, dtype=np.intp)
+
+    # global node index of each sample
+    key                 = np.repeat(
+        max_n_nodes * np.arange(n_estimators), n_subsamples
+    )
+    X_subsample         = X[subsamples.ravel()]
+
+    for depth in range(max_depth + 1):
+        order           = np.argsort(key, kind='mergesort')
+        key             = key[order]
+        X_subsample     = X_subsample[order]
+        is_first        = np.concatenate([[True], key[1:] != key[:-1]])
+        start           = np.flatnonzero(is_first)
+        count           = np.diff(np.append(start, key.size))
+        lower           = np.minimum.reduceat(X_subsample, start, axis=0)
+        upper           = np.maximum.reduceat(X_subsample, start, axis=0)
+        is_split        = (count > 1) & np.any(upper > lower, axis=1)
+
+        if depth == max_depth:
+            is_split[:] = False
+
+        node            = key[start]
+        leaf            = node[~is_split]
+        value.flat[leaf] = depth + _average_path_length(count[~is_split])
+
+        if not np.any(is_split):
+            break
+
+        # draw a feature that is not constant in each node
+        lower           = lower[is_split]
+        upper           = upper[is_split]
+        split           = node[is_split]
+        n_split,        = split.shape
+        rows            = np.arange(n_split)
+        score           = random_state.uniform(size=(n_split, n_features))
+        score[upper <= lower] = -1.
+        split_feature   = np.argmax(score, axis=1)
+        split_lower     = lower[rows, split_feature]
+        split_upper     = upper[rows, split_feature]
+        split_threshold = split_lower + random_state.uniform(
+            size=n_split
+        ) * (split_upper - split_lower)
+        split_threshold = split_threshold.astype(np.float32)
+
+        # keep the rounded threshold in [lower, upper) where float32 allows,
+        # so that both children receive samples
+        lowest          = split_lower.astype(np.float32)
+        lowest          = np.where(
+            lowest < split_lower,
+            np.nextafter(lowest, np.float32(np.inf)), lowest
+        )
+        split_threshold = np.maximum(split_threshold, lowest)
+        split_threshold = np.where(
+            split_threshold >= split_upper, lowest, split_threshold
+        )
+        feature.flat[split]   = split_feature
+        threshold.flat[split] = split_threshold
+
+        # allocate a pair of children for each split node of each tree
+        tree            = split // max_n_nodes
+        n_split_tree    = np.bincount(tree, minlength=n_estimators)
+        rank            = rows - (np.cumsum(n_split_tree) - n_split_tree)[tree]
+        children.flat[split] = n_nodes[tree] + 2 * rank
+        n_nodes        += 2 * n_split_tree
 
-__all__ = ['IForest']
+        # a child that receives no samples is a leaf at the next depth
+        left            = max_n_nodes * tree + children.flat[split]
+        value.flat[left]     = depth + 1
+        value.flat[left + 1] = depth + 1
+
+        # move the samples of the split nodes to their children
+        group           = np.cumsum(is_first) - 1
+        is_kept         = is_split[group]
+        group           = np.cumsum(is_split)[group[is_kept]] - 1
+        key             = key[is_kept]
+        X_subsample     = X_subsample[is_kept]
+        go_right        = X_subsample[
+            np.arange(key.size), split_feature[group]
+        ] > split_threshold[group]
+        key             = key - key % max_n_nodes \
+            + children.flat[split[group]] + go_right
+
+    is_used             = np.arange(max_n_nodes) < n_nodes[:, np.newaxis]
+    offset              = np.concatenate([[0], np.cumsum(n_nodes)])
+
+    if offset[-1] <= np.iinfo(np.int32).max:
+        offset          = offset.astype(np.int32)
+
+    return (
+        feature[is_used], threshold[is_used], children[is_used],
+        value[is_used], offset
+    )
+
+
+def _path_length(X, feature, threshold, children, value, offset, max_depth):
+    """Compute the path length of each sample in each tree by traversing
+    all trees level by level, where the trees start at the given offsets."""
+
+    n_samples, n_features = X.shape
+    offset                = np.asarray(offset, dtype=np.intp)
+    n_estimators,         = offset.shape
+    row_offset            = n_features * np.arange(n_samples)[:, np.newaxis]
+    node                  = np.zeros((n_samples, n_estimators), dtype=np.intp)
+    X                     = X.ravel()
+
+    for _ in range(max_depth):
+        ind               = offset + node
+        split_feature     = np.take(feature, ind)
+        is_split          = split_feature >= 0
+        go_right          = np.take(
+            X, row_offset + np.maximum(split_feature, 0)
+        ) > np.take(threshold, ind)
+        node              = np.where(
+            is_split, np.take(children, ind) + go_right, node
+        )
+
+    return np.take(value, offset + node)
+
+
+def _total_path_length(
+    X, feature, threshold, children, value, offset, max_depth
+):
+    """Compute the path length of each sample summed over all trees."""
+
+    return np.sum(
+        _path_length(
+            X, feature, threshold, children, value, offset, max_depth
+        ), axis=1, dtype=np.float64
+    )
+
+
+def _path_length_moments(
+    X, feature, threshold, children, value, offset, max_depth
+):
+    """Compute the sum and the sum of squares of the path length of each
+    sample over all trees."""
+
+    path_length = _path_length(
+        X, feature, threshold, children, value, offset, max_depth
+    ).astype(np.float64)
+
+    return np.stack([
+        np.sum(path_length, axis=1), np.sum(path_length ** 2, axis=1)
+    ], axis=1)
 
 
 class IForest(BaseOutlierDetector):
@@ -123,3 +337,524 @@ class IForest(BaseOutlierDetector):
 
     def _anomaly_score(self, X):
         return 0.5 - self.estimator_.decision_function(X)
+
+
+class FlatIForest(BaseOutlierDetector):
+    """Isolation forest stored in flat arrays.
+
+    Trees are grown level by level, all at once, and their nodes are stored
+    back to back in flat arrays, along with the offset of each tree. Samples
+    are scored by traversing all trees level by level for a block of rows at
+    a time.
+
+    Features are stored as int16 (int32 if there are more than 32767
+    features), children as int16 (int32 if a tree can have more than 32767
+    nodes), thresholds and leaf values as float32 and tree offsets as int32,
+    so that the trees take about a fifth of the space of those of
+    ``IForest`` when persisted. A persisted model can be scored straight
+    from a memory map, e.g. after ``joblib.load(filename, mmap_mode='r')``.
+
+    Parameters
+    ----------
+    bootstrap : bool, False
+        If True, individual trees are fit on random subsets of the training
+        data sampled with replacement. If False, sampling without replacement
+        is performed.
+
+    contamination : float, default 0.1
+        Proportion of outliers in the data set. Used to define the threshold.
+
+    max_samples : int, float or str, default 'auto'
+        Number of samples to draw from X to train each base estimator. If
+        'auto', min(256, n_samples) samples are drawn. If float, it must be
+        in (0, 1] and max(1, int(max_samples * n_samples)) samples are drawn.
+
+    n_estimators : int, default 100
+        Number of base estimators in the ensemble.
+
+    n_jobs : int, default 1
+        Number of jobs to run in parallel. If -1, then the number of jobs is
+        set to the number of CPU cores.
+
+    random_state : int or RandomState instance, default None
+        Seed of the pseudo random number generator.
+
+    window_size : int, default None
+        Number of most recent samples kept by ``partial_fit``. If None,
+        ``max_samples_`` is used. Must be greater than or equal to
+        ``max_samples_``, so that every tree is grown on ``max_samples_``
+        samples.
+
+    Attributes
+    ----------
+    anomaly_score_ : array-like of shape (n_samples,)
+        Anomaly score for each training data, or for each sample in the
+        window after ``partial_fit``.
+
+    contamination_ : float
+        Actual proportion of outliers in the data set.
+
+    threshold_ : float
+        Threshold.
+
+    max_depth_ : int
+        Maximum depth of each tree.
+
+    max_samples_ : int
+        Actual number of samples.
+
+    node_children_ : array-like of shape (n_nodes,)
+        Left child of each node, which is followed by the right child,
+        numbered from the first node of the tree.
+
+    node_feature_ : array-like of shape (n_nodes,)
+        Feature used to split each node, or -1 if the node is a leaf.
+
+    node_threshold_ : array-like of shape (n_nodes,)
+        Threshold used to split each node.
+
+    node_value_ : array-like of shape (n_nodes,)
+        Path length of each leaf, adjusted by the average path length of the
+        samples that reach it.
+
+    tree_offset_ : array-like of shape (n_estimators + 1,)
+        Index of the first node of each tree in the node arrays, followed by
+        the total number of nodes.
+
+    window_size_ : int
+        Actual number of most recent samples kept by ``partial_fit``.
+
+    References
+    ----------
+    .. [#liu08] Liu, F. T., Ting, K. M., and Zhou, Z.-H.,
+        "Isolation forest,"
+        In Proceedings of ICDM, pp. 413-422, 2008.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from kenchi.outlier_detection import FlatIForest
+    >>> X = np.array([
+    ...     [0., 0.], [1., 1.], [2., 0.], [3., -1.], [4., 0.],
+    ...     [5., 1.], [6., 0.], [7., -1.], [8., 0.], [1000., 1.]
+    ... ])
+    >>> det = FlatIForest(random_state=0)
+    >>> det.fit_predict(X)
+    array([ 1,  1,  1,  1,  1,  1,  1,  1,  1, -1])
+    """
+
+    def __init__(
+        self, bootstrap=False, contamination=0.1, max_samples='auto',
+        n_estimators=100, n_jobs=1, random_state=None, window_size=None
+    ):
+        self.bootstrap     = bootstrap
+        self.contamination = contamination
+        self.max_samples   = max_samples
+        self.n_estimators  = n_estimators
+        self.n_jobs        = n_jobs
+        self.random_state  = random_state
+        self.window_size   = window_size
+
+    def _check_params(self):
+        super()._check_params()
+
+        if self.n_estimators <= 0:
+            raise ValueError(
+                f'n_estimators must be positive but was {self.n_estimators}'
+            )
+
+        if self.window_size is not None and self.window_size <= 0:
+            raise ValueError(
+                f'window_size must be positive but was {self.window_size}'
+            )
+
+        if isinstance(self.max_samples, str):
+            if self.max_samples != 'auto':
+                raise ValueError(f'invalid max_samples {self.max_samples}')
+        elif isinstance(self.max_samples, float):
+            if not 0. < self.max_samples <= 1.:
+                raise ValueError(
+                    f'max_samples must be in (0, 1] but was '
+                    f'{self.max_samples}'
+                )
+        elif self.max_samples < 1:
+            raise ValueError(
+                f'max_samples must be positive but was {self.max_samples}'
+            )
+
+    def _check_is_fitted(self):
+        super()._check_is_fitted()
+
+        check_is_fitted(
+            self, [
+                'max_depth_', 'max_samples_', 'node_children_',
+                'node_feature_', 'node_threshold_', 'node_value_',
+                'tree_offset_', 'window_size_'
+            ]
+        )
+
+    def _get_max_samples(self, n_samples):
+        """Get the actual number of samples drawn for each tree."""
+
+        if self.max_samples == 'auto':
+            return np.minimum(256, n_samples)
+        elif isinstance(self.max_samples, float):
+            return np.maximum(1, int(self.max_samples * n_samples))
+        else:
+            return np.minimum(self.max_samples, n_samples)
+
+    def _fit(self, X):
+        n_samples, _        = X.shape
+        self._rnd           = check_random_state(self.random_state)
+        self.max_samples_   = self._get_max_samples(n_samples)
+        self.max_depth_     = int(
+            np.ceil(np.log2(np.maximum(self.max_samples_, 2)))
+        )
+
+        if self.window_size is None:
+            self.window_size_ = self.max_samples_
+        else:
+            self.window_size_ = self.window_size
+
+        # trees grown by partial_fit are normalized by max_samples_
+        if self.window_size_ < self.max_samples_:
+            raise ValueError(
+                f'window_size must be greater than or equal to '
+                f'max_samples_ but was {self.window_size}'
+            )
+
+        self.node_feature_, self.node_threshold_, self.node_children_, \
+            self.node_value_, self.tree_offset_ = self._grow(
+                X, self.n_estimators
+            )
+
+        # keep the most recent samples and their path lengths for partial_fit
+        total_path_length   = self._total_path_length(X)
+        self._X_window      = X[-self.window_size_:]
+        self._window_total_path_length = \
+            total_path_length[-self.window_size_:]
+        self._oldest        = 0
+
+        self._train_anomaly_score = self._normalize(total_path_length)
+
+        return self
+
+    def _anomaly_score(self, X):
+        return self._normalize(self._total_path_length(X))
+
+    def _normalize(self, total_path_length):
+        """Convert the total path length into the anomaly score."""
+
+        c = self.n_estimators * _average_path_length(self.max_samples_)
+
+        # every path length is 0 if a single sample is drawn for each tree
+        if c == 0.:
+            return np.full_like(total_path_length, 0.5)
+
+        return 2. ** (-total_path_length / c)
+
+    def _grow(self, X, n_estimators):
+        """Grow trees on subsamples of the given samples."""
+
+        n_samples, _     = X.shape
+
+        if self.bootstrap:
+            subsamples   = self._rnd.randint(
+                n_samples, size=(n_estimators, self.max_samples_)
+            )
+        else:
+            subsamples   = np.array([
+                self._rnd.choice(n_samples, self.max_samples_, replace=False)
+                for _ in range(n_estimators)
+            ])
+
+        return _build_trees(X, subsamples, self.max_depth_, self._rnd)
+
+    def _total_path_length(self, X, estimators=None):
+        """Compute the path length of each sample summed over the given
+        trees."""
+
+        if estimators is None:
+            estimators   = slice(None)
+
+        n_samples, _     = X.shape
+        offset           = self.tree_offset_[:-1][estimators]
+        n_estimators,    = offset.shape
+        chunk_n_rows     = get_chunk_n_rows(
+            row_bytes    = 40 * n_estimators,
+            max_n_rows   = n_samples
+        )
+
+        return np.concatenate(Parallel(n_jobs=self.n_jobs)(
+            delayed(_total_path_length)(
+                X[s], self.node_feature_, self.node_threshold_,
+                self.node_children_, self.node_value_, offset,
+                self.max_depth_
+            ) for s in gen_batches(n_samples, chunk_n_rows)
+        ))
+
+    def _path_length_moments(self, X, estimators):
+        """Compute the sum and the sum of squares of the path length of each
+        sample over the given trees."""
+
+        n_samples, _     = X.shape
+        offset           = self.tree_offset_[:-1][estimators]
+        n_estimators,    = offset.shape
+        chunk_n_rows     = get_chunk_n_rows(
+            row_bytes    = 48 * n_estimators,
+            max_n_rows   = n_samples
+        )
+
+        return np.concatenate(Parallel(n_jobs=self.n_jobs)(
+            delayed(_path_length_moments)(
+                X[s], self.node_feature_, self.node_threshold_,
+                self.node_children_, self.node_value_, offset,
+                self.max_depth_
+            ) for s in gen_batches(n_samples, chunk_n_rows)
+        ))
+
+    def predict(
+        self, X=None, threshold=None, early_stopping=False,
+        return_n_estimators=False
+    ):
+        """Predict if a particular sample is an outlier or not.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features), default None
+            Data. If None, predict if a particular training sample is an
+            outlier or not.
+
+        threshold : float, default None
+            User-provided threshold.
+
+        early_stopping : bool, default False
+            If True, trees are evaluated a few at a time, and a sample is no
+            longer evaluated once the average path length over the trees
+            seen so far is farther from the critical path length than a
+            bound derived from its standard deviation, widened by a union
+            bound over the repeated looks. The bound relies on a normal
+            approximation, so that a few samples near the threshold may be
+            predicted differently from the full ensemble. Ignored if X is
+            None or the threshold is not positive.
+
+        return_n_estimators : bool, default False
+            If True, return ``(y_pred, n_estimators)`` instead of y_pred.
+
+        Returns
+        -------
+        y_pred : array-like of shape (n_samples,)
+            Return -1 for outliers and +1 for inliers.
+
+        n_estimators : array-like of shape (n_samples,)
+            Number of trees evaluated for each sample. Only returned if
+            ``return_n_estimators`` is True.
+        """
+
+        if threshold is None and X is not None and early_stopping:
+            self._check_is_fitted()
+
+            threshold    = self.threshold_
+
+        # the critical path length is undefined for a non-positive threshold
+        if X is None or not early_stopping or threshold <= 0.:
+            y_pred       = super().predict(X, threshold=threshold)
+            n_estimators = np.full(y_pred.shape, self.n_estimators)
+        else:
+            y_pred, n_estimators = self._predict_early_stopping(
+                X, threshold
+            )
+
+        if return_n_estimators:
+            return y_pred, n_estimators
+        else:
+            return y_pred
+
+    def _predict_early_stopping(self, X, threshold):
+        """Predict if a particular sample is an outlier or not, evaluating
+        only as many trees as needed, and return the number of trees
+        evaluated for each sample."""
+
+        self._check_is_fitted()
+
+        X                 = self._check_array(X, estimator=self)
+        n_samples, _      = X.shape
+        c                 = _average_path_length(self.max_samples_)
+
+        # a sample is an outlier if its average path length is less than the
+        # critical path length
+        critical_path_length = -c * np.log2(threshold)
+
+        moments           = np.zeros((n_samples, 2))
+        n_estimators_used = np.zeros(n_samples, dtype=np.intp)
+        is_uncertain      = np.ones(n_samples, dtype=bool)
+
+        # split the error rate over the looks at the trees evaluated so far,
+        # so that a sample stopped at any look is misclassified with
+        # probability about EARLY_STOPPING_ALPHA under a normal approximation
+        n_looks           = int(np.ceil(
+            self.n_estimators / N_ESTIMATORS_PER_STEP
+        )) - 1
+        z_score           = norm.isf(
+            EARLY_STOPPING_ALPHA / (2. * np.maximum(n_looks, 1))
+        )
+
+        for start in range(0, self.n_estimators, N_ESTIMATORS_PER_STEP):
+            ind           = np.flatnonzero(is_uncertain)
+
+            if ind.size == 0:
+                break
+
+            stop          = np.minimum(
+                start + N_ESTIMATORS_PER_STEP, self.n_estimators
+            )
+            moments[ind] += self._path_length_moments(
+                X[ind], slice(start, stop)
+            )
+            n_estimators_used[ind] = stop
+
+            if stop == self.n_estimators:
+                break
+
+            # finite population bound on the difference between the average
+            # path length over the evaluated trees and over all trees
+            mean          = moments[ind, 0] / stop
+            std           = np.sqrt(np.maximum(
+                moments[ind, 1] / stop - mean ** 2, 0.
+            ))
+            bound         = z_score * std * np.sqrt(
+                (self.n_estimators - stop) / (self.n_estimators * stop)
+            )
+            is_uncertain[ind] = \
+                np.abs(mean - critical_path_length) <= bound
+
+        y_pred            = np.where(
+            moments[:, 0] / n_estimators_used >= critical_path_length,
+            POS_LABEL,
+            NEG_LABEL
+        )
+
+        return y_pred, n_estimators_used
+
+    def partial_fit(self, X, y=None):
+        """Update the model with a batch of samples.
+
+        The batch enters a window of the most recent samples, and the oldest
+        trees are replaced with trees grown on subsamples of the window, in
+        proportion to the fraction of the window taken by the batch. The path
+        lengths of the samples in the window are updated only for the
+        replaced trees, so that each update costs O(n_batch * n_estimators).
+        The threshold is refreshed from the samples in the window.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features)
+            Batch of samples.
+
+        y : ignored
+
+        Returns
+        -------
+        self : object
+            Return self.
+        """
+
+        try:
+            self._check_is_fitted()
+        except NotFittedError:
+            return self.fit(X)
+
+        if not hasattr(self, '_X_window'):
+            raise ValueError(
+                'partial_fit is not available when the model was persisted '
+                'with keep_window=False'
+            )
+
+        X                     = self._check_array(X, estimator=self)
+        n_samples, _          = X.shape
+        X_window              = np.concatenate(
+            [self._X_window, X]
+        )[-self.window_size_:]
+        total_path_length     = np.concatenate([
+            self._window_total_path_length, self._total_path_length(X)
+        ])[-self.window_size_:]
+        n_window, _           = X_window.shape
+        n_replaced            = int(np.minimum(
+            self.n_estimators,
+            np.ceil(self.n_estimators * n_samples / self.window_size_)
+        ))
+        replaced              = (
+            self._oldest + np.arange(n_replaced)
+        ) % self.n_estimators
+        total_path_length    -= self._total_path_length(X_window, replaced)
+
+        # put the new trees after the current ones and gather all trees back
+        # to back in their order
+        *new_trees, new_offset = self._grow(X_window, n_replaced)
+        n_nodes               = np.diff(self.tree_offset_).astype(np.intp)
+        start                 = self.tree_offset_[:-1].astype(np.intp)
+        n_nodes[replaced]     = np.diff(new_offset)
+        start[replaced]       = self.tree_offset_[-1] + new_offset[:-1]
+        tree_offset           = np.concatenate([[0], np.cumsum(n_nodes)])
+        ind                   = np.repeat(
+            start - tree_offset[:-1], n_nodes
+        ) + np.arange(tree_offset[-1])
+
+        for name, new in zip(
+            ['node_feature_', 'node_threshold_', 'node_children_',
+             'node_value_'], new_trees
+        ):
+            setattr(
+                self, name, np.concatenate([getattr(self, name), new])[ind]
+            )
+
+        self.tree_offset_     = tree_offset.astype(new_offset.dtype)
+
+        total_path_length    += self._total_path_length(X_window, replaced)
+        self._X_window        = X_window
+        self._window_total_path_length = total_path_length
+        self._oldest          = (
+            self._oldest + n_replaced
+        ) % self.n_estimators
+
+        self.anomaly_score_   = self._normalize(total_path_length)
+        self.threshold_       = self._get_threshold()
+        self.contamination_   = self._get_contamination()
+        self.random_variable_ = self._get_random_variable()
+
+        return self
+
+    def to_pickle(self, filename, keep_window=True, **kwargs):
+        """Persist an outlier detector object.
+
+        Parameters
+        ----------
+        filename : str or pathlib.Path
+            Path of the file in which it is to be stored.
+
+        keep_window : bool, default True
+            If False, the window of the most recent samples and the random
+            state used by ``partial_fit`` are not stored, so that only what
+            is needed for scoring is persisted. The loaded model cannot be
+            updated by ``partial_fit``.
+
+        kwargs : dict
+            Other keywords passed to ``sklearn.externals.joblib.dump``.
+
+        Returns
+        -------
+        filenames : list
+            List of file names in which the data is stored.
+        """
+
+        if keep_window:
+            return super().to_pickle(filename, **kwargs)
+
+        det = copy.copy(self)
+
+        for name in [
+            '_X_window', '_window_total_path_length', '_oldest', '_rnd'
+        ]:
+            delattr(det, name)
+
+        return dump(det, filename, **kwargs)
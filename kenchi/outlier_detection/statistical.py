@@ -1,12 +1,15 @@
 import numpy as np
+from scipy.special import logsumexp
 from sklearn.cluster import affinity_propagation
 from sklearn.covariance import GraphLasso
 from sklearn.mixture import GaussianMixture
-from sklearn.neighbors import KernelDensity
+from sklearn.neighbors import DistanceMetric, KernelDensity
+from sklearn.utils import gen_batches
 from sklearn.utils.validation import check_is_fitted
 
 from .base import BaseOutlierDetector
 from ..plotting import plot_graphical_model, plot_partial_corrcoef
+from ..utils import compute_coreset, get_chunk_n_rows
 
 __all__ = ['GMM', 'HBOS', 'KDE', 'SparseStructureLearning']
 
@@ -320,6 +323,12 @@ class KDE(BaseOutlierDetector):
     contamination : float, default 0.1
         Proportion of outliers in the data set. Used to define the threshold.
 
+    coreset_size : int, default None
+        Maximum number of prototypes that replace the training data. If None,
+        the whole training data is kept. Otherwise, each sample is represented
+        by its nearest prototype found by greedy k-center clustering and the
+        density is estimated from the prototypes weighted accordingly.
+
     kernel : str, default 'gaussian'
         Kernel to use. Valid kernels are
         ['gaussian'|'tophat'|'epanechnikov'|'exponential'|'linear'|'cosine'].
@@ -347,8 +356,12 @@ class KDE(BaseOutlierDetector):
     threshold_ : float
         Threshold.
 
+    coreset_weights_ : array-like of shape (n_prototypes,)
+        Number of training samples represented by each prototype. None if
+        ``coreset_size`` is None.
+
     X_ : array-like of shape (n_samples, n_features)
-        Training data.
+        Training data, or prototypes if ``coreset_size`` is not None.
 
     Examples
     --------
@@ -363,20 +376,32 @@ class KDE(BaseOutlierDetector):
     array([ 1,  1,  1,  1,  1,  1,  1,  1,  1, -1])
     """
 
+    @property
+    def _metric_params(self):
+        if self.metric_params is None:
+            return dict()
+        else:
+            return self.metric_params
+
     @property
     def X_(self):
-        return self.estimator_.tree_.data
+        if self.coreset_weights_ is None:
+            return self.estimator_.tree_.data
+        else:
+            return self._prototypes
 
     def __init__(
         self, algorithm='auto', atol=0., bandwidth=1.,
-        breadth_first=True, contamination=0.1, kernel='gaussian', leaf_size=40,
-        metric='euclidean', rtol=0., metric_params=None
+        breadth_first=True, contamination=0.1, coreset_size=None,
+        kernel='gaussian', leaf_size=40, metric='euclidean', rtol=0.,
+        metric_params=None
     ):
         self.algorithm     = algorithm
         self.atol          = atol
         self.bandwidth     = bandwidth
         self.breadth_first = breadth_first
         self.contamination = contamination
+        self.coreset_size  = coreset_size
         self.kernel        = kernel
         self.leaf_size     = leaf_size
         self.metric        = metric
@@ -386,10 +411,18 @@ class KDE(BaseOutlierDetector):
     def _check_is_fitted(self):
         super()._check_is_fitted()
 
-        check_is_fitted(self, 'X_')
+        check_is_fitted(self, ['coreset_weights_', 'X_'])
+
+    def _check_params(self):
+        super()._check_params()
+
+        if self.coreset_size is not None and self.coreset_size <= 0:
+            raise ValueError(
+                f'coreset_size must be positive but was {self.coreset_size}'
+            )
 
     def _fit(self, X):
-        self.estimator_   = KernelDensity(
+        estimator         = KernelDensity(
             algorithm     = self.algorithm,
             atol          = self.atol,
             bandwidth     = self.bandwidth,
@@ -399,12 +432,73 @@ class KDE(BaseOutlierDetector):
             metric        = self.metric,
             rtol          = self.rtol,
             metric_params = self.metric_params
-        ).fit(X)
+        )
+
+        if self.coreset_size is None:
+            self.coreset_weights_ = None
+            self.estimator_       = estimator.fit(X)
+
+        else:
+            coreset, self.coreset_weights_, _ = compute_coreset(
+                X, self.coreset_size, metric=self.metric,
+                **self._metric_params
+            )
+            self._prototypes      = X[coreset]
+            self.metric_          = DistanceMetric.get_metric(
+                self.metric, **self._metric_params
+            )
+
+            # the kernel is equal to 1 at the origin, so that the log-density
+            # of a single point evaluated at itself is the log of the
+            # normalization constant
+            self._log_norm        = estimator.fit(
+                X[:1]
+            ).score_samples(X[:1])[0] - np.log(np.sum(self.coreset_weights_))
 
         return self
 
     def _anomaly_score(self, X):
-        return -self.estimator_.score_samples(X)
+        if self.coreset_weights_ is None:
+            return -self.estimator_.score_samples(X)
+
+        n_samples, _  = X.shape
+        n_prototypes, = self.coreset_weights_.shape
+        log_weights   = np.log(self.coreset_weights_)
+        log_density   = np.empty(n_samples)
+        chunk_n_rows  = get_chunk_n_rows(
+            row_bytes=8 * n_prototypes, max_n_rows=n_samples
+        )
+
+        for s in gen_batches(n_samples, chunk_n_rows):
+            dist           = self.metric_.pairwise(X[s], self.X_)
+            log_density[s] = logsumexp(
+                self._log_kernel(dist) + log_weights, axis=1
+            )
+
+        return -log_density - self._log_norm
+
+    def _log_kernel(self, dist):
+        """Compute the logarithm of the unnormalized kernel."""
+
+        u = dist / self.bandwidth
+
+        if self.kernel == 'gaussian':
+            return -0.5 * u ** 2
+
+        if self.kernel == 'exponential':
+            return -u
+
+        if self.kernel == 'tophat':
+            kernel = np.ones_like(u)
+        elif self.kernel == 'epanechnikov':
+            kernel = 1. - u ** 2
+        elif self.kernel == 'linear':
+            kernel = 1. - u
+        else:
+            kernel = np.cos(0.5 * np.pi * u)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(u < 1., np.log(kernel), -np.inf)
 
 
 class SparseStructureLearning(BaseOutlierDetector):
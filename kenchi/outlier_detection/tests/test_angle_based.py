@@ -1,6 +1,8 @@
 import doctest
 import unittest
 
+import numpy as np
+
 from kenchi.outlier_detection import angle_based
 from kenchi.tests.common_tests import OutlierDetectorTestMixin
 
@@ -17,3 +19,81 @@ class FastABODTest(unittest.TestCase, OutlierDetectorTestMixin):
             self.prepare_data()
 
         self.sut = angle_based.FastABOD(n_neighbors=3)
+
+    def test_exact_abof(self):
+        X                = np.random.RandomState(0).randn(20, 3)
+        X_test           = np.random.RandomState(1).randn(5, 3)
+
+        for n_pairs in [None, 4]:
+            det          = angle_based.FastABOD(
+                n_neighbors=5, novelty=True, n_pairs=n_pairs, random_state=0
+            ).fit(X)
+
+            for query, is_train in [(X, True), (X_test, False)]:
+                abof     = np.empty(len(query))
+
+                for i, x in enumerate(query):
+                    dist         = np.linalg.norm(X - x, axis=1)
+
+                    if is_train:
+                        dist[i]  = np.inf
+
+                    diff         = X[np.argsort(dist)[:5]] - x
+                    norm_squared = np.sum(diff ** 2, axis=1)
+                    wcos         = [
+                        diff[j] @ diff[k] / norm_squared[j] / norm_squared[k]
+                        for j, k in det.pairs_
+                    ]
+                    abof[i]      = np.var(wcos)
+
+                np.testing.assert_allclose(
+                    det._abof(det.X_ if is_train else query), abof
+                )
+
+
+class FastABODSamplingTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = angle_based.FastABOD(
+            n_neighbors=10, n_pairs=20, random_state=0
+        )
+
+    def test_all_pairs(self):
+        det_exact   = angle_based.FastABOD(n_neighbors=10).fit(self.X_train)
+        det_sampled = angle_based.FastABOD(
+            n_neighbors=10, n_pairs=100, random_state=0
+        ).fit(self.X_train)
+
+        self.assertEqual(det_sampled.pairs_.shape, (45, 2))
+        np.testing.assert_allclose(
+            det_sampled.anomaly_score_, det_exact.anomaly_score_
+        )
+
+
+class FastVOATest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = angle_based.FastVOA(random_state=0)
+
+    def test_exact_voa(self):
+        n_samples, _ = self.X_train.shape
+        ind_a, ind_b = np.triu_indices(n_samples - 1, k=1)
+        voa          = np.empty(n_samples)
+
+        for i in range(n_samples):
+            diff     = np.delete(self.X_train, i, axis=0) - self.X_train[i]
+            diff    /= np.linalg.norm(diff, axis=1)[:, np.newaxis]
+            cos      = np.clip(diff @ diff.T, -1., 1.)
+            voa[i]   = np.var(np.arccos(cos[ind_a, ind_b]))
+
+        det          = angle_based.FastVOA(
+            n_projections=2000, random_state=0
+        ).fit(self.X_train)
+
+        self.assertGreater(
+            np.corrcoef(voa, det._voa(det._projections))[0, 1], 0.9
+        )
@@ -4,6 +4,7 @@ import unittest
 import numpy as np
 from kenchi.outlier_detection import classification_based
 from kenchi.tests.common_tests import OutlierDetectorTestMixin
+from sklearn.metrics.pairwise import rbf_kernel
 
 
 def load_tests(loader, tests, ignore):
@@ -26,3 +27,135 @@ class OCSVMTest(unittest.TestCase, OutlierDetectorTestMixin):
         y_pred_estimator = self.sut.estimator_.predict(self.X_test)
 
         np.testing.assert_equal(y_pred_sut, y_pred_estimator)
+
+    def test_rbf_kernel_dot(self):
+        self.sut.set_params(n_jobs=2).fit(self.X_train)
+
+        Q  = rbf_kernel(
+            self.sut.support_vectors_, gamma=self.sut.estimator_._gamma
+        )
+        c2 = (self.sut.dual_coef_ @ Q @ self.sut.dual_coef_.T)[0, 0]
+
+        self.assertAlmostEqual(
+            self.sut.R2_, c2 + 2. * self.sut.intercept_[0] + 1.
+        )
+
+        anomaly_score = self.sut.R2_ - 2. / self.sut.nu_l_ \
+            * self.sut.estimator_.decision_function(self.X_test).flat[:]
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score(self.X_test), anomaly_score
+        )
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score(self.X_test.astype(np.float32)),
+            anomaly_score,
+            rtol=1e-04
+        )
+
+    def test_reduction_tol(self):
+        det = classification_based.OCSVM(reduction_tol=0.1, random_state=0)
+
+        self.sut.fit(self.X_train)
+        det.fit(self.X_train)
+
+        self.assertLess(
+            det.expansion_vectors_.shape[0],
+            self.sut.support_vectors_.shape[0]
+        )
+
+        np.testing.assert_allclose(
+            det.anomaly_score(self.X_test),
+            self.sut.anomaly_score(self.X_test),
+            atol=0.1
+        )
+
+
+class SGDOCSVMTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = classification_based.SGDOCSVM(
+            n_components=500, random_state=0
+        )
+
+    def test_predict(self):
+        super().test_predict()
+
+        det              = classification_based.OCSVM(random_state=0)
+        y_pred_sut       = self.sut.predict(self.X_test)
+        y_pred_exact     = det.fit(self.X_train).predict(self.X_test)
+
+        self.assertGreaterEqual(np.mean(y_pred_sut == y_pred_exact), 0.8)
+
+    def test_nystroem(self):
+        self.sut.set_params(kernel_approximation='nystroem')
+
+        self.sut.fit(self.X_train)
+
+        self.assertEqual(self.sut.coef_.shape, (75,))
+
+    def test_check_params(self):
+        self.sut.set_params(kernel_approximation='laplacian')
+
+        with self.assertRaises(ValueError):
+            self.sut.fit(self.X_train)
+
+    def test_partial_fit(self):
+        self.sut.set_params(
+            batch_size=5, eta0=0.2, gamma=0.5, learning_rate='constant'
+        )
+
+        self.sut.partial_fit(self.X_train)
+
+        X_shifted = self.X_train + 10.
+
+        for batch in np.array_split(X_shifted, 5):
+            self.sut.partial_fit(batch)
+
+        self.assertGreater(
+            np.mean(self.sut.predict(X_shifted) == 1),
+            np.mean(self.sut.predict(self.X_train) == 1)
+        )
+
+    def test_partial_fit_stationary(self):
+        rnd    = np.random.RandomState(0)
+        X_test = rnd.randn(2000, 2)
+
+        self.sut.set_params(n_components=100, nu=0.1)
+        self.sut.fit(rnd.randn(2000, 2))
+
+        for _ in range(200):
+            self.sut.partial_fit(rnd.randn(1, 2))
+
+        self.assertEqual(self.sut.n_samples_seen_, 2200)
+        self.assertGreater(self.sut.random_variable_.std(), 0.)
+        self.assertAlmostEqual(
+            np.mean(self.sut.predict(X_test) == 1), 0.9, delta=0.03
+        )
+
+
+class EnsembleOCSVMTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = classification_based.EnsembleOCSVM(
+            n_estimators=3, n_jobs=2, random_state=0
+        )
+
+    def test_fit(self):
+        super().test_fit()
+
+        self.assertEqual(len(self.sut.estimators_), 3)
+
+    def test_cascade(self):
+        self.sut.set_params(cascade=True).fit(self.X_train)
+
+        est, = self.sut.estimators_
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score(self.X_test),
+            est.anomaly_score(self.X_test) / est.R2_
+        )
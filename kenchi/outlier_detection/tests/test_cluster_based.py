@@ -1,8 +1,11 @@
 import doctest
 import unittest
 
+import numpy as np
+
 from kenchi.outlier_detection import clustering_based
 from kenchi.tests.common_tests import OutlierDetectorTestMixin
+from sklearn.cluster import MiniBatchKMeans
 
 
 def load_tests(loader, tests, ignore):
@@ -17,3 +20,122 @@ class MiniBatchKMeansTest(unittest.TestCase, OutlierDetectorTestMixin):
             self.prepare_data()
 
         self.sut = clustering_based.MiniBatchKMeans(random_state=0)
+
+    def test_partial_fit(self):
+        anomaly_score = []
+
+        for batch in np.array_split(self.X_train, 5):
+            self.sut.partial_fit(batch)
+
+            anomaly_score.append(self.sut.anomaly_score_)
+
+        anomaly_score = np.concatenate(anomaly_score)
+
+        self.assertEqual(self.sut.n_samples_seen_, 75)
+        self.assertAlmostEqual(
+            self.sut.random_variable_.mean(), np.mean(anomaly_score)
+        )
+        self.assertAlmostEqual(
+            self.sut.random_variable_.std(), np.std(anomaly_score)
+        )
+
+    def test_partial_fit_threshold(self):
+        X   = np.random.RandomState(0).randn(2000, 2)
+        sut = clustering_based.MiniBatchKMeans(random_state=0).fit(X)
+
+        for batch in np.array_split(X, 10):
+            self.sut.partial_fit(batch)
+
+        threshold = np.percentile(
+            self.sut.anomaly_score(X), 90., interpolation='lower'
+        )
+
+        np.testing.assert_allclose(self.sut.threshold_, threshold, rtol=0.05)
+        np.testing.assert_allclose(
+            self.sut.threshold_, sut.threshold_, rtol=0.15
+        )
+
+    def test_kd_tree(self):
+        det = clustering_based.MiniBatchKMeans(
+            algorithm='kd_tree', random_state=0
+        )
+
+        self.sut.fit(self.X_train)
+        det.fit(self.X_train)
+
+        self.assertEqual(self.sut.algorithm_, 'brute')
+        self.assertEqual(det.algorithm_, 'kd_tree')
+
+        anomaly_score = np.min(
+            self.sut.estimator_.transform(self.X_test), axis=1
+        )
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score(self.X_test), anomaly_score
+        )
+        np.testing.assert_allclose(
+            det.anomaly_score(self.X_test), anomaly_score
+        )
+
+    def test_integer_data(self):
+        X             = np.random.RandomState(0).randint(100, size=(200, 2))
+
+        self.sut.fit(X)
+
+        anomaly_score = np.min(
+            self.sut.estimator_.transform(X.astype(np.float64)), axis=1
+        )
+
+        np.testing.assert_allclose(self.sut.anomaly_score_, anomaly_score)
+
+    def test_k_means_plusplus(self):
+        estimator       = MiniBatchKMeans(n_init=3, random_state=0).fit(
+            self.X_train
+        )
+        cluster_centers = self.sut.fit(self.X_train).cluster_centers_
+
+        self.assertLess(self.sut.inertia_, 1.1 * estimator.inertia_)
+
+        self.sut.set_params(n_jobs=2)
+
+        np.testing.assert_array_equal(
+            self.sut.fit(self.X_train).cluster_centers_, cluster_centers
+        )
+
+    def test_random(self):
+        self.sut.set_params(init='random')
+
+        cluster_centers = self.sut.fit(self.X_train).cluster_centers_
+
+        self.assertEqual(cluster_centers.shape, (8, 2))
+
+        np.testing.assert_array_equal(
+            self.sut.fit(self.X_train).cluster_centers_, cluster_centers
+        )
+
+    def test_k_means_parallel(self):
+        self.sut.set_params(init='k-means||', n_jobs=2)
+
+        cluster_centers = self.sut.fit(self.X_train).cluster_centers_
+
+        self.assertEqual(cluster_centers.shape, (8, 2))
+
+        np.testing.assert_array_equal(
+            self.sut.fit(self.X_train).cluster_centers_, cluster_centers
+        )
+
+    def test_k_means_parallel_kd_tree(self):
+        X   = np.random.RandomState(0).randn(2000, 2)
+        det = clustering_based.MiniBatchKMeans(
+            algorithm='brute', init='k-means||', n_clusters=300,
+            random_state=0
+        ).fit(X)
+
+        self.sut.set_params(
+            algorithm='kd_tree', init='k-means||', n_clusters=300
+        ).fit(X)
+
+        self.assertEqual(
+            np.unique(self.sut._init_centers(X), axis=0).shape, (300, 2)
+        )
+        self.assertLess(self.sut.inertia_, 1.1 * det.inertia_)
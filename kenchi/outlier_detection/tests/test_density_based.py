@@ -2,7 +2,9 @@ import doctest
 import unittest
 
 import numpy as np
+from kenchi.datasets import load_pima, load_wilt
 from kenchi.outlier_detection import density_based
+from sklearn.neighbors import LocalOutlierFactor
 from kenchi.tests.common_tests import OutlierDetectorTestMixin
 
 
@@ -23,6 +25,109 @@ class LOFTest(unittest.TestCase, OutlierDetectorTestMixin):
         super().test_predict()
 
         y_pred_sut       = self.sut.predict(self.X_test)
-        y_pred_estimator = self.sut.estimator_._predict(self.X_test)
+        y_pred_estimator = LocalOutlierFactor(n_neighbors=3).fit(
+            self.X_train
+        )._predict(self.X_test)
 
         np.testing.assert_equal(y_pred_sut, y_pred_estimator)
+
+    def test_float32(self):
+        self.sut.set_params(novelty=True)
+        self.sut.fit(self.X_train)
+
+        anomaly_score = self.sut.anomaly_score(self.X_test)
+
+        self.sut.fit(self.X_train.astype(np.float32))
+
+        anomaly_score_float32 = self.sut.anomaly_score(
+            self.X_test.astype(np.float32)
+        )
+
+        self.assertEqual(anomaly_score_float32.dtype, np.float32)
+        np.testing.assert_allclose(
+            anomaly_score_float32, anomaly_score, rtol=1e-4, atol=1e-4
+        )
+
+    def test_add_samples(self):
+        self.sut.set_params(novelty=True)
+        self.sut.fit(self.X_train[:50])
+
+        for stop in [52, 75]:
+            self.sut.add_samples(self.X_train[self.sut.X_.shape[0]:stop])
+
+            det = density_based.LOF(n_neighbors=3, novelty=True)
+
+            det.fit(self.X_train[:stop])
+
+            np.testing.assert_allclose(
+                self.sut.negative_outlier_factor_,
+                det.negative_outlier_factor_
+            )
+            np.testing.assert_allclose(
+                self.sut.anomaly_score(self.X_test),
+                det.anomaly_score(self.X_test)
+            )
+            self.assertAlmostEqual(self.sut.threshold_, det.threshold_)
+
+    def test_add_samples_metric(self):
+        for metric in ['cosine', 'correlation']:
+            self.sut.set_params(algorithm='brute', metric=metric)
+            self.sut.fit(self.X_train[:70]).add_samples(self.X_train[70:])
+
+            det = density_based.LOF(
+                algorithm='brute', metric=metric, n_neighbors=3
+            ).fit(self.X_train)
+
+            np.testing.assert_allclose(
+                self.sut.negative_outlier_factor_,
+                det.negative_outlier_factor_, rtol=1e-6
+            )
+
+
+class LOFPartitionTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = density_based.LOF(n_neighbors=3, n_partitions=4)
+
+    def test_exact(self):
+        for load in [load_pima, load_wilt]:
+            X, _          = load(return_X_y=True)
+            det           = density_based.LOF().fit(X)
+            det_partition = density_based.LOF(
+                n_jobs=2, n_partitions=7
+            ).fit(X)
+
+            np.testing.assert_allclose(
+                det_partition.negative_outlier_factor_,
+                det.negative_outlier_factor_
+            )
+
+    def test_check_params(self):
+        self.sut.set_params(metric='cosine')
+
+        self.assertRaises(ValueError, self.sut.fit, self.X_train)
+
+
+class MultiLOFTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = density_based.MultiLOF(max_neighbors=5, min_neighbors=3)
+
+    def test_combination(self):
+        self.sut.set_params(novelty=True)
+        self.sut.fit(self.X_train)
+
+        lof = [
+            density_based.LOF(n_neighbors=n_neighbors, novelty=True).fit(
+                self.X_train
+            ).anomaly_score(self.X_test)
+            for n_neighbors in range(3, 6)
+        ]
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score(self.X_test), np.max(lof, axis=0)
+        )
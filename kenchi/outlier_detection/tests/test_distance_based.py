@@ -1,8 +1,12 @@
 import doctest
 import unittest
 
+import numpy as np
+
 from kenchi.outlier_detection import distance_based
 from kenchi.tests.common_tests import OutlierDetectorTestMixin
+from sklearn.exceptions import NotFittedError
+from sklearn.metrics.pairwise import euclidean_distances
 
 
 def load_tests(loader, tests, ignore):
@@ -18,6 +22,81 @@ class KNNTest(unittest.TestCase, OutlierDetectorTestMixin):
 
         self.sut = distance_based.KNN(n_neighbors=3)
 
+    def test_add_samples(self):
+        X   = np.concatenate([self.X_train, self.X_test])
+        sut = distance_based.KNN(n_neighbors=3).fit(X)
+
+        self.sut.fit(self.X_train).add_samples(self.X_test)
+
+        np.testing.assert_allclose(self.sut.anomaly_score_, sut.anomaly_score_)
+        self.assertEqual(self.sut.threshold_, sut.threshold_)
+
+    def test_add_samples_notfitted(self):
+        self.assertRaises(NotFittedError, self.sut.add_samples, self.X_test)
+
+    def test_add_samples_cosine(self):
+        X   = np.concatenate([self.X_train, self.X_test])
+        sut = distance_based.KNN(
+            algorithm='brute', metric='cosine', n_neighbors=3
+        ).fit(X)
+
+        self.sut.set_params(algorithm='brute', metric='cosine')
+        self.sut.fit(self.X_train).add_samples(self.X_test)
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score_, sut.anomaly_score_, atol=1e-12
+        )
+
+
+class KNNCoresetTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = distance_based.KNN(coreset_size=20, n_neighbors=3)
+
+    def test_exact_coreset(self):
+        for novelty in [False, True]:
+            sut = distance_based.KNN(n_neighbors=3, novelty=novelty)
+
+            sut.fit(self.X_train)
+            self.sut.set_params(
+                coreset_size=len(self.X_train), novelty=novelty
+            ).fit(self.X_train)
+
+            np.testing.assert_allclose(
+                self.sut.anomaly_score_, sut.anomaly_score_
+            )
+
+            if novelty:
+                np.testing.assert_allclose(
+                    self.sut.anomaly_score(self.X_test),
+                    sut.anomaly_score(self.X_test)
+                )
+                np.testing.assert_allclose(
+                    self.sut.anomaly_score(self.X_train[:5]),
+                    sut.anomaly_score(self.X_train[:5])
+                )
+
+    def test_cosine(self):
+        self.sut.set_params(algorithm='brute', metric='cosine')
+        self.sut.fit(self.X_train)
+
+        self.assertEqual(
+            np.sum(self.sut.coreset_weights_), len(self.X_train)
+        )
+
+        sut = distance_based.KNN(
+            algorithm='brute', metric='cosine', n_neighbors=3
+        ).fit(self.X_train)
+
+        self.sut.set_params(coreset_size=len(self.X_train))
+        self.sut.fit(self.X_train)
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score_, sut.anomaly_score_, atol=1e-12
+        )
+
 
 class OneTimeSamplingTest(unittest.TestCase, OutlierDetectorTestMixin):
     def setUp(self):
@@ -27,3 +106,43 @@ class OneTimeSamplingTest(unittest.TestCase, OutlierDetectorTestMixin):
         self.sut = distance_based.OneTimeSampling(
             n_subsamples=3, random_state=0
         )
+
+
+class OneTimeSamplingEnsembleTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = distance_based.OneTimeSampling(
+            n_estimators=5, n_subsamples=3, random_state=0
+        )
+
+    def test_single_estimator(self):
+        self.sut.set_params(n_estimators=1).fit(self.X_train)
+
+        anomaly_score = np.min(
+            euclidean_distances(self.X_train, self.sut.S_), axis=1
+        )
+
+        np.testing.assert_allclose(self.sut.anomaly_score_, anomaly_score)
+
+
+class OneTimeSamplingTreeTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = distance_based.OneTimeSampling(
+            algorithm='kd_tree', n_estimators=5, n_subsamples=3,
+            random_state=0
+        )
+
+    def test_brute(self):
+        self.sut.fit(self.X_train)
+
+        sut = distance_based.OneTimeSampling(
+            algorithm='brute', n_estimators=5, n_subsamples=3,
+            random_state=0
+        ).fit(self.X_train)
+
+        np.testing.assert_allclose(self.sut.anomaly_score_, sut.anomaly_score_)
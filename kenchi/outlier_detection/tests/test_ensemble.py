@@ -1,8 +1,11 @@
 import doctest
+import os
+import tempfile
 import unittest
 
 import numpy as np
 from kenchi.outlier_detection import ensemble
+from sklearn.externals.joblib import load
 from kenchi.tests.common_tests import OutlierDetectorTestMixin
 
 
@@ -26,3 +29,157 @@ class IForestTest(unittest.TestCase, OutlierDetectorTestMixin):
         y_pred_estimator = self.sut.estimator_.predict(self.X_test)
 
         np.testing.assert_equal(y_pred_sut, y_pred_estimator)
+
+
+class FlatIForestTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = ensemble.FlatIForest(random_state=0)
+
+    def test_path_length(self):
+        self.sut.fit(self.X_train)
+
+        path_length = ensemble._path_length(
+            self.X_test, self.sut.node_feature_, self.sut.node_threshold_,
+            self.sut.node_children_, self.sut.node_value_,
+            self.sut.tree_offset_[:-1], self.sut.max_depth_
+        )
+
+        for i, x in enumerate(self.X_test):
+            for j in range(self.sut.n_estimators):
+                offset = self.sut.tree_offset_[j]
+                node   = offset
+
+                while self.sut.node_feature_[node] >= 0:
+                    feature = self.sut.node_feature_[node]
+                    node    = offset + self.sut.node_children_[node] \
+                        + (x[feature] > self.sut.node_threshold_[node])
+
+                self.assertLess(node, self.sut.tree_offset_[j + 1])
+                self.assertEqual(path_length[i, j], self.sut.node_value_[node])
+
+    def test_partial_fit(self):
+        self.sut.set_params(window_size=50)
+        self.sut.partial_fit(self.X_train[:50])
+
+        for batch in np.split(self.X_train[50:], 5):
+            self.sut.partial_fit(batch)
+
+            self.assertEqual(self.sut._oldest % 10, 0)
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score_,
+            self.sut.anomaly_score(self.X_train[-50:])
+        )
+
+        n_nodes = np.diff(self.sut.tree_offset_)
+
+        self.assertEqual(self.sut.tree_offset_[-1], len(self.sut.node_value_))
+        self.assertTrue(np.all(n_nodes > 0))
+
+    def test_max_samples(self):
+        self.sut.set_params(max_samples=1e-04).fit(self.X_train)
+
+        self.assertEqual(self.sut.max_samples_, 1)
+        self.assertTrue(np.all(np.isfinite(self.sut.anomaly_score_)))
+
+        for max_samples in [0., 1.5, 0, -1, 'manual']:
+            self.sut.set_params(max_samples=max_samples)
+
+            self.assertRaises(ValueError, self.sut.fit, self.X_train)
+
+    def test_window_size_smaller_than_max_samples(self):
+        self.sut.set_params(max_samples=50, window_size=10)
+
+        self.assertRaises(ValueError, self.sut.fit, self.X_train)
+
+    def test_to_pickle(self):
+        self.sut.fit(self.X_train)
+
+        self.assertEqual(self.sut.node_feature_.dtype, np.int16)
+        self.assertEqual(self.sut.node_threshold_.dtype, np.float32)
+        self.assertEqual(self.sut.node_children_.dtype, np.int16)
+        self.assertEqual(self.sut.node_value_.dtype, np.float32)
+        self.assertEqual(self.sut.tree_offset_.dtype, np.int32)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'det.pkl')
+
+            self.sut.to_pickle(filename)
+
+            det      = load(filename, mmap_mode='r')
+
+            self.assertIsInstance(det.node_threshold_, np.memmap)
+
+            np.testing.assert_array_equal(
+                det.anomaly_score(self.X_test),
+                self.sut.anomaly_score(self.X_test)
+            )
+
+    def test_to_pickle_without_window(self):
+        self.sut.fit(self.X_train)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'det.pkl')
+
+            self.sut.to_pickle(filename, keep_window=False)
+
+            det      = load(filename)
+
+        self.assertFalse(hasattr(det, '_X_window'))
+        self.assertTrue(hasattr(self.sut, '_X_window'))
+
+        np.testing.assert_array_equal(
+            det.anomaly_score(self.X_test),
+            self.sut.anomaly_score(self.X_test)
+        )
+
+        self.assertRaises(ValueError, det.partial_fit, self.X_test)
+
+    def test_early_stopping(self):
+        rnd                  = np.random.RandomState(0)
+        X_train              = rnd.randn(2000, 2)
+        X_test               = rnd.randn(2000, 2)
+
+        self.sut.fit(X_train)
+
+        y_pred, n_estimators = self.sut.predict(
+            X_test, early_stopping=True, return_n_estimators=True
+        )
+
+        self.assertTrue(np.all(n_estimators <= self.sut.n_estimators))
+        self.assertLess(np.mean(n_estimators), 0.5 * self.sut.n_estimators)
+        self.assertGreaterEqual(
+            np.mean(y_pred == self.sut.predict(X_test)), 0.99
+        )
+
+    def test_early_stopping_nonpositive_threshold(self):
+        self.sut.fit(self.X_train)
+
+        y_pred, n_estimators = self.sut.predict(
+            self.X_test, threshold=0., early_stopping=True,
+            return_n_estimators=True
+        )
+
+        np.testing.assert_array_equal(
+            y_pred, self.sut.predict(self.X_test, threshold=0.)
+        )
+        np.testing.assert_array_equal(n_estimators, self.sut.n_estimators)
+
+    def test_float32_threshold(self):
+        rnd         = np.random.RandomState(0)
+        X           = np.concatenate([
+            1.5e+09 + rnd.randint(2000, size=(3000, 1)), rnd.randn(3000, 1)
+        ], axis=1)
+
+        self.sut.fit(X)
+
+        path_length = ensemble._path_length(
+            X, self.sut.node_feature_, self.sut.node_threshold_,
+            self.sut.node_children_, self.sut.node_value_,
+            self.sut.tree_offset_[:-1], self.sut.max_depth_
+        )
+
+        self.assertGreaterEqual(np.min(path_length), 1.)
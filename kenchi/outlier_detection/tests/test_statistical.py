@@ -1,6 +1,8 @@
 import doctest
 import unittest
 
+import numpy as np
+
 from kenchi.outlier_detection import statistical
 from kenchi.tests.common_tests import OutlierDetectorTestMixin
 from sklearn.exceptions import NotFittedError
@@ -29,6 +31,23 @@ class KDETest(unittest.TestCase, OutlierDetectorTestMixin):
         self.sut = statistical.KDE()
 
 
+class KDECoresetTest(unittest.TestCase, OutlierDetectorTestMixin):
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, self.y_test = \
+            self.prepare_data()
+
+        self.sut = statistical.KDE(coreset_size=20)
+
+    def test_exact_coreset(self):
+        sut = statistical.KDE().fit(self.X_train)
+
+        self.sut.set_params(coreset_size=len(self.X_train)).fit(self.X_train)
+
+        np.testing.assert_allclose(
+            self.sut.anomaly_score_, sut.anomaly_score_
+        )
+
+
 class HBOSTest(unittest.TestCase, OutlierDetectorTestMixin):
     def setUp(self):
         self.X_train, self.X_test, self.y_train, self.y_test = \
@@ -1,3 +1,23 @@
+import numpy as np
+from sklearn.metrics import pairwise_distances
+
+__all__        = [
+    'check_contamination', 'compute_coreset', 'fast_pairwise_distances',
+    'get_chunk_n_rows', 'merge_moments', 'reserve_rows'
+]
+
+FAST_METRICS   = {
+    'cityblock': 'manhattan',
+    'cosine':    'cosine',
+    'euclidean': 'euclidean',
+    'l1':        'manhattan',
+    'l2':        'euclidean',
+    'manhattan': 'manhattan'
+}
+
+WORKING_MEMORY = 1024
+
+
 def check_contamination(contamination, low=0., high=0.5):
     """Raise ValueError if the contamination is not valid."""
 
@@ -5,3 +25,253 @@ def check_contamination(contamination, low=0., high=0.5):
         raise ValueError(
             f'contamination must be in (low, high] but was {contamination}'
         )
+
+
+def compute_coreset(X, coreset_size, metric='euclidean', **kwargs):
+    """Compute a weighted coreset of the given data by greedy k-center
+    clustering (farthest-first traversal).
+
+    Parameters
+    ----------
+    X : array-like of shape (n_samples, n_features)
+        Data.
+
+    coreset_size : int
+        Maximum number of prototypes.
+
+    metric : str or callable, default 'euclidean'
+        Distance metric to use.
+
+    **kwargs : dict
+        Other keywords passed to ``sklearn.metrics.pairwise_distances``.
+
+    Returns
+    -------
+    coreset : array-like of shape (n_prototypes,)
+        Indices of the prototypes.
+
+    weights : array-like of shape (n_prototypes,)
+        Number of samples assigned to each prototype.
+
+    labels : array-like of shape (n_samples,)
+        Index of the prototype each sample is assigned to.
+
+    References
+    ----------
+    .. [#gonzalez85] Gonzalez, T. F.,
+        "Clustering to minimize the maximum intercluster distance,"
+        Theoretical Computer Science, 38, pp. 293-306, 1985.
+    """
+
+    n_samples, _ = X.shape
+    coreset_size = np.minimum(coreset_size, n_samples)
+
+    coreset      = np.empty(coreset_size, dtype=np.intp)
+    labels       = np.zeros(n_samples, dtype=np.intp)
+    dist         = pairwise_distances(X, X[:1], metric=metric, **kwargs)[:, 0]
+    coreset[0]   = 0
+
+    # a prototype is at distance 0 from itself despite rounding errors
+    dist[0]      = 0.
+
+    for i in range(1, coreset_size):
+        farthest = np.argmax(dist)
+
+        # stop early as every sample already coincides with a prototype
+        if dist[farthest] == 0.:
+            coreset = coreset[:i]
+
+            break
+
+        coreset[i] = farthest
+        new_dist   = pairwise_distances(
+            X, X[farthest:farthest + 1], metric=metric, **kwargs
+        )[:, 0]
+        new_dist[farthest] = 0.
+        is_closer  = new_dist < dist
+        labels[is_closer] = i
+        dist[is_closer]   = new_dist[is_closer]
+
+    n_prototypes, = coreset.shape
+    weights       = np.bincount(labels, minlength=n_prototypes)
+
+    return coreset, weights, labels
+
+
+def fast_pairwise_distances(
+    X, Y, metric='euclidean', squared=False, Y_norm_squared=None
+):
+    """Compute the distance matrix between each pair of samples with BLAS
+    backed or vectorized kernels. Computation is done in the dtype of X, so
+    that float32 data is not upcast.
+
+    Parameters
+    ----------
+    X : array-like of shape (n_samples_X, n_features)
+        Data.
+
+    Y : array-like of shape (n_samples_Y, n_features)
+        Data.
+
+    metric : str, default 'euclidean'
+        Distance metric to use. Valid metrics are
+        ['cityblock'|'cosine'|'euclidean'|'l1'|'l2'|'manhattan'].
+
+    squared : bool, default False
+        If True, return squared Euclidean distances. Ignored if the metric is
+        not Euclidean.
+
+    Y_norm_squared : array-like of shape (n_samples_Y,), default None
+        Pre-computed squared Euclidean norms of the samples in Y. Ignored if
+        the metric is Manhattan.
+
+    Returns
+    -------
+    dist : array-like of shape (n_samples_X, n_samples_Y)
+        Distance matrix.
+    """
+
+    metric = FAST_METRICS[metric]
+    Y      = Y.astype(X.dtype, copy=False)
+
+    if metric == 'manhattan':
+        return np.sum(np.abs(X[:, np.newaxis, :] - Y[np.newaxis]), axis=2)
+
+    if Y_norm_squared is None:
+        Y_norm_squared = np.einsum('ij,ij->i', Y, Y)
+
+    X_norm_squared     = np.einsum('ij,ij->i', X, X)
+    Y_norm_squared     = Y_norm_squared.astype(X.dtype, copy=False)
+
+    if metric == 'cosine':
+        X_norm         = np.sqrt(X_norm_squared)
+        Y_norm         = np.sqrt(Y_norm_squared)
+
+        # zero vectors are orthogonal to every other vector
+        X_norm[X_norm == 0.] = 1.
+        Y_norm[Y_norm == 0.] = 1.
+
+        dist           = (X / -X_norm[:, np.newaxis]) \
+            @ (Y / Y_norm[:, np.newaxis]).T
+        dist          += 1.
+
+        return dist
+
+    # scale the smaller operand to save a pass over the distance matrix
+    dist               = (-2. * X) @ Y.T
+    dist              += X_norm_squared[:, np.newaxis]
+    dist              += Y_norm_squared
+
+    # clip negative values due to rounding errors
+    np.maximum(dist, 0., out=dist)
+
+    if squared:
+        return dist
+
+    return np.sqrt(dist, out=dist)
+
+
+def get_chunk_n_rows(row_bytes, max_n_rows=None, working_memory=None):
+    """Calculate how many rows can be processed within working memory.
+
+    Parameters
+    ----------
+    row_bytes : int
+        Expected number of bytes required for each row.
+
+    max_n_rows : int, default None
+        Maximum number of rows.
+
+    working_memory : int, default None
+        Number of MiB allowed for temporary arrays. If None, 1024 MiB is used.
+
+    Returns
+    -------
+    chunk_n_rows : int
+        Number of rows that fit within working memory, at least 1.
+    """
+
+    if working_memory is None:
+        working_memory = WORKING_MEMORY
+
+    chunk_n_rows     = int(working_memory * 2 ** 20 // row_bytes)
+
+    if max_n_rows is not None:
+        chunk_n_rows = np.minimum(chunk_n_rows, max_n_rows)
+
+    return np.maximum(1, chunk_n_rows)
+
+
+def merge_moments(n_samples, mean, m2, x):
+    """Merge the given values into the moments of the values seen so far, by
+    the method of Chan et al.
+
+    Parameters
+    ----------
+    n_samples : int
+        Number of values seen so far.
+
+    mean : float
+        Mean of the values seen so far.
+
+    m2 : float
+        Sum of the squared deviations from the mean of the values seen so far.
+
+    x : array-like of shape (n_new,)
+        New values.
+
+    Returns
+    -------
+    n_samples : int
+        Number of values seen so far, including the new values.
+
+    mean : float
+        Mean of the values seen so far, including the new values.
+
+    m2 : float
+        Sum of the squared deviations from the mean of the values seen so far,
+        including the new values.
+    """
+
+    n_new,    = x.shape
+    n_merged  = n_samples + n_new
+    mean_new  = np.mean(x)
+    delta     = mean_new - mean
+    mean     += delta * n_new / n_merged
+    m2       += np.sum((x - mean_new) ** 2) \
+        + delta ** 2 * n_samples * n_new / n_merged
+
+    return n_merged, mean, m2
+
+
+def reserve_rows(array, n_rows):
+    """Make room for the given number of rows, doubling the capacity of the
+    array when it is full, so that appending rows costs amortized constant
+    time per row.
+
+    Parameters
+    ----------
+    array : array-like of shape (capacity, ...)
+        Array whose leading rows are in use.
+
+    n_rows : int
+        Number of rows needed.
+
+    Returns
+    -------
+    reserved : array-like of shape (new_capacity, ...)
+        The array itself if it has at least the given number of rows, or a
+        copy of it with max(n_rows, 2 * capacity) rows otherwise.
+    """
+
+    capacity, *shape = array.shape
+
+    if n_rows <= capacity:
+        return array
+
+    reserved         = np.empty(
+        [np.maximum(n_rows, 2 * capacity)] + shape, dtype=array.dtype
+    )
+    reserved[:capacity] = array
+
+    return reserved